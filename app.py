@@ -1,5 +1,4 @@
 import streamlit as st
-from src.sales_automation import process
 
 # Title of the app
 st.title("Personalized Message Generator")
@@ -14,12 +13,19 @@ style = st.selectbox("Choose message style", ["Professional", "Friendly", "Intri
 
 additional_notes = st.text_input("Additional notes:")
 
+refresh = st.checkbox(
+    "Refresh website data", help="Scrape the company website again for changes"
+)
+
 
 # Button to generate the personalized message
 if st.button("Generate personalized message"):
     if company_url and user_id:
         with st.spinner("Generating message..."):
-            message = process(company_url, user_id, style, additional_notes)
+            # Imported on first use, so that the page renders before the scraping and LLM stack loads
+            from src.sales_automation import process
+
+            message = process(company_url, user_id, style, additional_notes, refresh)
             st.success(message)
     else:
         st.error("Please provide both Company URL and User ID.")
@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+# Startup budget of the CLI, in milliseconds
+IMPORT_TIME_BUDGET_MS = 100
+
+# Modules that must only be loaded when first needed, never at startup
+LAZY_MODULES = ("langchain_openai", "linkedin_api", "faiss", "openai")
+
+# Number of measured runs, the fastest is kept to leave out disk cache warmup
+N_RUNS = 3
+
+ROOT_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command-line arguments for the script.
+
+    Returns:
+        argparse.Namespace: Parsed command-line arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Check that importing the CLI stays within its startup budget"
+    )
+    parser.add_argument(
+        "--budget_ms",
+        type=float,
+        default=IMPORT_TIME_BUDGET_MS,
+        help="Maximum import time of the cli module, in milliseconds",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=N_RUNS, help="Number of measured runs"
+    )
+
+    return parser.parse_args()
+
+
+def measure_import(module: str = "cli") -> Tuple[float, List[str]]:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Args:
+        module (str): Name of the module to import.
+
+    Returns:
+        Tuple[float, List[str]]: Cumulative import time of the module in milliseconds,
+            and the lazy modules that were loaded by the import.
+    """
+    code = (
+        f"import sys, json, {module}; "
+        f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_FOLDER,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    import_time_us = next(
+        int(line.split("|")[1])
+        for line in reversed(result.stderr.splitlines())
+        if line.startswith("import time:") and line.split("|")[2].strip() == module
+    )
+
+    return import_time_us / 1000, json.loads(result.stdout)
+
+
+def main():
+    """
+    Main function checking the import time and the lazily loaded modules.
+    """
+    args = parse_arguments()
+
+    measurements = [measure_import() for _ in range(args.runs)]
+    import_time_ms = min(time for time, _ in measurements)
+    loaded_modules = sorted(set().union(*(modules for _, modules in measurements)))
+
+    print(f"Import time of cli: {import_time_ms:.1f} ms, budget: {args.budget_ms} ms")
+
+    errors = []
+    if import_time_ms > args.budget_ms:
+        errors.append(f"import time exceeds the budget of {args.budget_ms} ms")
+    if loaded_modules:
+        errors.append(f"modules loaded at startup: {', '.join(loaded_modules)}")
+
+    for error in errors:
+        print(f"Error: {error}", file=sys.stderr)
+
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import argparse
 
-from src.sales_automation import process
+from src.utils import BATCH_RESULTS_PATH, MAX_LEAD_WORKERS
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -37,6 +37,37 @@ def parse_arguments() -> argparse.Namespace:
         default="Mention a 10% promotion next week",
         help="Company's additional otes to mention in sales message",
     )
+    parser.add_argument(
+        "--leads_file",
+        type=str,
+        default=None,
+        help="CSV or JSONL file of leads (company_url, user_id, optional style and "
+        "additional_notes) to process in one batch instead of --url and --user_id",
+    )
+    parser.add_argument(
+        "--output_file",
+        type=str,
+        default=BATCH_RESULTS_PATH,
+        help="JSONL file to append batch results to",
+    )
+
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        default=MAX_LEAD_WORKERS,
+        help="Maximum number of leads processed at the same time in batch mode",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Scrape company websites again, downloading only pages that changed",
+    )
+    parser.add_argument(
+        "--download_tokenizer",
+        action="store_true",
+        help="Download the tokenizer to the data folder, so that token counting "
+        "works offline, and exit",
+    )
 
     return parser.parse_args()
 
@@ -47,7 +78,30 @@ def run():
     user_id = args.user_id
     style = args.style
     additional_notes = args.additional_notes
-    process(url, user_id, style, additional_notes)
+
+    if args.download_tokenizer:
+        from src.tokens import get_encoding, TOKENIZER_CACHE_FOLDER
+
+        if get_encoding() is None:
+            raise SystemExit("Could not download the tokenizer")
+        print(f"Tokenizer saved to: {TOKENIZER_CACHE_FOLDER}")
+        return
+
+    # Imported after parsing, so that --help does not load the scraping and LLM stack
+    from src.sales_automation import process, process_batch, read_leads
+
+    if args.leads_file:
+        leads = read_leads(args.leads_file)
+        process_batch(
+            leads,
+            args.output_file,
+            style,
+            additional_notes,
+            args.max_workers,
+            args.refresh,
+        )
+    else:
+        process(url, user_id, style, additional_notes, args.refresh)
 
 
 if __name__ == "__main__":
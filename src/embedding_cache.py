@@ -0,0 +1,300 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.rate_limiter import call_with_rate_limit, get_embedding_rate_limiter
+from src.tokens import count_tokens
+from src.utils import RELATIVE_FOLDER
+
+try:
+    import fcntl
+except ImportError:
+    # Windows, the store is then only safe within one process
+    fcntl = None
+
+EMBEDDING_CACHE_FOLDER = os.path.join(RELATIVE_FOLDER, "embedding_cache")
+KEYS_FILENAME = "keys.txt"
+VECTORS_FILENAME = "vectors.f32"
+META_FILENAME = "meta.json"
+LOCK_FILENAME = "lock"
+
+
+class EmbeddingStore:
+    def __init__(self, folder: str):
+        """
+        Initialize an append-only on-disk store of embedding vectors.
+
+        Vectors are kept as rows of one float32 file read through a memory map,
+        and their keys as lines of a text file in the same order. The store may be
+        shared by several processes, e.g. the app and a CLI batch, so files are
+        read and appended under an exclusive file lock.
+
+        Args:
+            folder (str): Folder of the store.
+        """
+        self.folder = folder
+        self.keys_path = os.path.join(folder, KEYS_FILENAME)
+        self.vectors_path = os.path.join(folder, VECTORS_FILENAME)
+        self.meta_path = os.path.join(folder, META_FILENAME)
+        self.lock_path = os.path.join(folder, LOCK_FILENAME)
+        self.lock = threading.Lock()
+        self.rows: Dict[str, int] = {}
+        self.dimension: Optional[int] = None
+        self.vectors: Optional[np.ndarray] = None
+        # Sizes of the files when last loaded, to skip reloading unchanged files
+        self.keys_size = 0
+        self.vectors_size = 0
+
+        os.makedirs(folder, exist_ok=True)
+        with self.lock, self.file_lock():
+            self.load()
+
+        logging.info(
+            f"Embedding cache loaded from: {self.folder}, vectors: {len(self.rows)}"
+        )
+
+    @contextmanager
+    def file_lock(self) -> Iterator[None]:
+        """
+        Hold an exclusive lock on the store across processes.
+        """
+        with open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self) -> None:
+        """
+        Load keys and memory-map vectors, dropping rows left incomplete by an interrupted write.
+
+        Must be called with the file lock held, so no other process is appending.
+        Files unchanged since the last load are not read again.
+        """
+        if not os.path.exists(self.meta_path):
+            return
+
+        if self.dimension is None:
+            with open(self.meta_path, "r") as json_file:
+                self.dimension = json.load(json_file)["dimension"]
+
+        keys_size = (
+            os.path.getsize(self.keys_path) if os.path.exists(self.keys_path) else 0
+        )
+        vectors_size = (
+            os.path.getsize(self.vectors_path)
+            if os.path.exists(self.vectors_path)
+            else 0
+        )
+        if (keys_size, vectors_size) == (self.keys_size, self.vectors_size):
+            return
+
+        keys = []
+        if keys_size:
+            with open(self.keys_path, "r") as file:
+                keys = file.read().splitlines()
+
+        row_size = self.dimension * np.dtype(np.float32).itemsize
+        n_rows = min(len(keys), vectors_size // row_size)
+
+        # Vectors are written before keys, a crash can leave vectors without keys
+        if n_rows < len(keys):
+            keys = keys[:n_rows]
+            with open(self.keys_path, "w") as file:
+                file.write("".join(f"{key}\n" for key in keys))
+        if vectors_size != n_rows * row_size:
+            with open(self.vectors_path, "r+b") as file:
+                file.truncate(n_rows * row_size)
+
+        self.rows = {key: row for row, key in enumerate(keys)}
+        self.keys_size = os.path.getsize(self.keys_path) if keys_size else 0
+        self.vectors_size = n_rows * row_size
+        self.map_vectors()
+
+    def map_vectors(self) -> None:
+        # The shape is given explicitly, another process may be appending a row
+        if self.rows:
+            self.vectors = np.memmap(
+                self.vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self.rows), self.dimension),
+            )
+        else:
+            self.vectors = None
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """
+        Get the vector stored under a key.
+
+        Args:
+            key (str): Key of the vector.
+
+        Returns:
+            Optional[List[float]]: Vector, None if not stored.
+        """
+        with self.lock:
+            row = self.rows.get(key)
+            if row is None:
+                return None
+            return self.vectors[row].tolist()
+
+    def add(self, keys: List[str], vectors: List[List[float]]) -> None:
+        """
+        Append vectors to the store.
+
+        Rows appended by other processes are loaded first, so new rows are numbered
+        after them and keys already stored elsewhere are not appended twice.
+
+        Args:
+            keys (List[str]): Keys of the vectors.
+            vectors (List[List[float]]): Vectors to store.
+        """
+        with self.lock, self.file_lock():
+            self.load()
+
+            new_rows = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self.rows and key not in new_rows:
+                    new_rows[key] = vector
+
+            if not new_rows:
+                return
+
+            array = np.asarray(list(new_rows.values()), dtype=np.float32)
+
+            if self.dimension is None:
+                self.dimension = array.shape[1]
+                with open(self.meta_path, "w") as json_file:
+                    json.dump({"dimension": self.dimension}, json_file)
+
+            # Vectors are written before keys, so a crash never leaves a key without a vector
+            with open(self.vectors_path, "ab") as file:
+                file.write(array.tobytes())
+            with open(self.keys_path, "a") as file:
+                file.write("".join(f"{key}\n" for key in new_rows))
+
+            first_row = self.vectors_size // array[0].nbytes
+            for row, key in enumerate(new_rows, start=first_row):
+                self.rows[key] = row
+            self.keys_size = os.path.getsize(self.keys_path)
+            self.vectors_size = os.path.getsize(self.vectors_path)
+            self.map_vectors()
+
+
+@lru_cache(maxsize=None)
+def get_embedding_store(folder: str) -> EmbeddingStore:
+    """
+    Get the embedding store of a folder, shared by all users in the process.
+
+    Args:
+        folder (str): Folder of the store.
+
+    Returns:
+        EmbeddingStore: Embedding store.
+    """
+    return EmbeddingStore(folder)
+
+
+class CachedEmbeddings(Embeddings):
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        cache_folder: str = EMBEDDING_CACHE_FOLDER,
+    ):
+        """
+        Initialize embeddings that look up a persistent cache before calling the model.
+
+        Calls to the model wait for the shared embedding rate limits.
+
+        The cache is content-addressed by the hash of the model name and the text,
+        so it is shared by all companies and runs using the same model.
+
+        Args:
+            embeddings (Embeddings): Embedding model used on cache misses.
+            model_name (str): Name of the embedding model.
+            cache_folder (str): Root folder of the embedding cache.
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.store = get_embedding_store(
+            os.path.join(cache_folder, model_name.replace("/", "_"))
+        )
+
+    def get_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\n{text}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents, calling the model only for texts not in the cache.
+
+        Args:
+            texts (List[str]): Texts to embed.
+
+        Returns:
+            List[List[float]]: Embedding of each text.
+        """
+        keys = [self.get_key(text) for text in texts]
+        vectors = [self.store.get(key) for key in keys]
+
+        missing = {}
+        for index, (key, vector) in enumerate(zip(keys, vectors)):
+            if vector is None:
+                missing.setdefault(key, []).append(index)
+
+        if missing:
+            missing_keys = list(missing)
+            missing_texts = [texts[missing[key][0]] for key in missing_keys]
+            missing_vectors = call_with_rate_limit(
+                get_embedding_rate_limiter(),
+                sum(count_tokens(text, self.model_name) for text in missing_texts),
+                self.embeddings.embed_documents,
+                missing_texts,
+            )
+            self.store.add(missing_keys, missing_vectors)
+
+            for key, vector in zip(missing_keys, missing_vectors):
+                for index in missing[key]:
+                    vectors[index] = list(vector)
+
+        logging.info(
+            f"Embedded {len(texts)} texts, cache hits: {len(texts) - sum(len(i) for i in missing.values())}"
+        )
+
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query, calling the model only if it is not in the cache.
+
+        Args:
+            text (str): Query to embed.
+
+        Returns:
+            List[float]: Embedding of the query.
+        """
+        key = self.get_key(text)
+        vector = self.store.get(key)
+
+        if vector is None:
+            vector = call_with_rate_limit(
+                get_embedding_rate_limiter(),
+                count_tokens(text, self.model_name),
+                self.embeddings.embed_query,
+                text,
+            )
+            self.store.add([key], [vector])
+
+        return vector
@@ -0,0 +1,133 @@
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.tokens import count_tokens
+
+# Token budget of one embedding request
+EMBEDDING_BATCH_MAX_TOKENS = 20_000
+
+# Maximum number of texts in one embedding request
+EMBEDDING_BATCH_MAX_SIZE = 256
+
+# Maximum number of embedding requests in flight
+EMBEDDING_MAX_CONCURRENCY = 4
+
+
+def make_batches(
+    docs: Dict[str, Document],
+    max_tokens: int = EMBEDDING_BATCH_MAX_TOKENS,
+    max_size: int = EMBEDDING_BATCH_MAX_SIZE,
+) -> Iterator[List[Tuple[str, Document]]]:
+    """
+    Group documents into batches bounded by their token count and size.
+
+    Args:
+        docs (Dict[str, Document]): Documents keyed by id.
+        max_tokens (int): Token budget of one batch.
+        max_size (int): Maximum number of documents in one batch.
+
+    Yields:
+        List[Tuple[str, Document]]: Batch of (id, document) pairs.
+    """
+    batch = []
+    batch_tokens = 0
+
+    for doc_id, doc in docs.items():
+        doc_tokens = count_tokens(doc.page_content)
+
+        if batch and (batch_tokens + doc_tokens > max_tokens or len(batch) >= max_size):
+            yield batch
+            batch, batch_tokens = [], 0
+
+        batch.append((doc_id, doc))
+        batch_tokens += doc_tokens
+
+    if batch:
+        yield batch
+
+
+def embed_batches(
+    embeddings: Embeddings,
+    batches: Iterator[List[Tuple[str, Document]]],
+    max_concurrency: int = EMBEDDING_MAX_CONCURRENCY,
+) -> Iterator[Tuple[List[Tuple[str, Document]], List[List[float]]]]:
+    """
+    Embed batches concurrently, yielding each batch with its vectors as soon as it is done.
+
+    At most max_concurrency batches are in flight, so memory stays bounded.
+    Requests and tokens per minute are limited by the embedding model itself
+    (see CachedEmbeddings).
+
+    Args:
+        embeddings (Embeddings): Embedding model.
+        batches (Iterator[List[Tuple[str, Document]]]): Batches of (id, document) pairs.
+        max_concurrency (int): Maximum number of embedding requests in flight.
+
+    Yields:
+        Tuple[List[Tuple[str, Document]], List[List[float]]]: Batch and its vectors,
+            in completion order.
+    """
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        in_flight = {}
+
+        for batch in batches:
+            if len(in_flight) >= max_concurrency:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield in_flight.pop(future), future.result()
+
+            texts = [doc.page_content for _, doc in batch]
+            in_flight[executor.submit(embeddings.embed_documents, texts)] = batch
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield in_flight.pop(future), future.result()
+
+
+def add_documents_in_batches(
+    db: Optional[FAISS],
+    docs: Dict[str, Document],
+    embeddings: Embeddings,
+    max_concurrency: int = EMBEDDING_MAX_CONCURRENCY,
+) -> Optional[FAISS]:
+    """
+    Embed documents in concurrent batches and stream the vectors into a FAISS index.
+
+    Args:
+        db (Optional[FAISS]): Index to add to, a new one is created if None.
+        docs (Dict[str, Document]): Documents keyed by id.
+        embeddings (Embeddings): Embedding model.
+        max_concurrency (int): Maximum number of embedding requests in flight.
+
+    Returns:
+        Optional[FAISS]: Index containing the documents, None if there was nothing to add to a new index.
+    """
+    n_batches = 0
+
+    for batch, vectors in embed_batches(
+        embeddings, make_batches(docs), max_concurrency
+    ):
+        ids = [doc_id for doc_id, _ in batch]
+        text_embeddings = [
+            (doc.page_content, vector) for (_, doc), vector in zip(batch, vectors)
+        ]
+        metadatas = [doc.metadata for _, doc in batch]
+
+        if db is None:
+            db = FAISS.from_embeddings(
+                text_embeddings, embeddings, metadatas=metadatas, ids=ids
+            )
+        else:
+            db.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+
+        n_batches += 1
+
+    logging.info(f"Embedded {len(docs)} documents in {n_batches} batches")
+
+    return db
@@ -1,55 +1,77 @@
+import asyncio
+import json
 import re
 import os
-import openai
 from dotenv import load_dotenv, find_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
-from langchain.schema import HumanMessage, SystemMessage
-from langchain_community.vectorstores import FAISS
-from langchain_community.document_loaders import TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from src.llm_cache import invoke_with_cache
+from src.llm_cache import DEFAULT_COMPLETION_TOKENS
+from src.llm_clients import get_chat_model, get_embedding_model
+from src.scraping.dedup import remove_repeated_blocks
 from src.prompts import (
     PERSONALIZED_MESSAGE_PROMPT,
     COMPANY_SUMMARY_SYSTEM_PROMPT,
+    COMPANY_PART_SUMMARY_SYSTEM_PROMPT,
+    COMPANY_SUMMARY_REDUCE_SYSTEM_PROMPT,
     LEAD_SUMMARY_SYSTEM_PROMPT,
 )
+from src.tokens import (
+    count_message_tokens,
+    count_tokens,
+    get_context_window,
+    split_to_tokens,
+    truncate_to_tokens,
+)
 from src.utils import (
     save_lead_summary_and_facts,
     read_lead_summary_and_facts,
     LEAD_SUMMARY_AND_FACTS_FILENAME,
     save_lead_personalized_message,
     WEBSITE_INFO_FILENAME,
+    page_records_exist,
+    read_page_texts,
+    read_pages_index,
+    get_content_hash,
+    save_txt,
+    read_txt,
 )
 import warnings
-from typing import List
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+# langchain and FAISS are imported where they are used, so that importing this
+# module stays fast; the OpenAI key is read from the environment by the clients
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+
+    from src.embedding_cache import CachedEmbeddings
 
 warnings.filterwarnings("ignore")
 
 # Load environment variables from .env file
 _ = load_dotenv(find_dotenv())
 
-# Set OpenAI API key
-openai.api_key = os.environ["OPENAI_API_KEY"]
-
 # LLM model configuration
 llm_model = "gpt-3.5-turbo"
 
-# Context window configuration for LLM
-CONTEXT_WINDOW_GPT35 = 16_385
-N_CHARACTERS_PER_TOKEN = 4
-SAFE_COEF = 0.9
-MAX_NUMBER_OF_CHARACTERS_IN_CONTEXT_WINDOW = int(
-    SAFE_COEF
-    * (
-        CONTEXT_WINDOW_GPT35 * N_CHARACTERS_PER_TOKEN
-        - max(len(COMPANY_SUMMARY_SYSTEM_PROMPT), len(LEAD_SUMMARY_SYSTEM_PROMPT))
-    )
-)
+# Tokens of the context window kept free for the completion
+COMPLETION_TOKENS_RESERVE = DEFAULT_COMPLETION_TOKENS
+
+# Texts larger than the context window are summarized in parts of this many tokens;
+# smaller parts than the window keep each call fast and summarize in parallel
+SUMMARY_PART_MAX_TOKENS = 6_000
+
+# Maximum number of parts summarized at the same time
+SUMMARY_MAX_CONCURRENCY = 8
+
+# Maximum number of rounds of partial summaries; if the partial summaries still
+# do not fit in one call after them, they are truncated to the context window
+MAX_REDUCE_ROUNDS = 3
 
 RAG_FOLDER_NAME = "RAG"
 FAISS_FOLDER_NAME = "faiss_index"
+INDEXED_PAGES_FILENAME = "indexed_pages.txt"
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 50
 MIN_CHUNK_LENGTH = 100
@@ -82,55 +104,163 @@ def get_facts_and_summary(text: str, system_prompt: str) -> str:
     Returns:
         str: Generated facts and summary.
     """
-    chat = ChatOpenAI(
-        temperature=0.2,
-        model=llm_model,
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    chat = get_chat_model(llm_model, 0.2)
+    content = invoke_with_cache(
+        chat, [SystemMessage(content=system_prompt), HumanMessage(content=text)]
     )
-    result = chat.invoke(
-        [SystemMessage(content=system_prompt), HumanMessage(content=text)]
+    logging.info(f"Created facts and summary with LLM, size: {len(content)}")
+    return content
+
+
+async def aget_facts_and_summary(text: str, system_prompt: str) -> str:
+    """
+    Async version of get_facts_and_summary.
+
+    The call runs in a worker thread over the shared sync client, so it reuses
+    the LLM cache, concurrency cap and rate limits, and works in any event loop.
+
+    Args:
+        text (str): Input text to generate facts and summary.
+        system_prompt (str): System prompt template for LLM.
+
+    Returns:
+        str: Generated facts and summary.
+    """
+    return await asyncio.to_thread(get_facts_and_summary, text, system_prompt)
+
+
+def get_prompt_token_budget(system_prompt: str, model: str = llm_model) -> int:
+    """
+    Get the number of tokens left for the user text of a prompt.
+
+    Args:
+        system_prompt (str): System prompt sent with the text.
+        model (str): Name of the chat model.
+
+    Returns:
+        int: Token budget of the user text.
+    """
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    prompt_overhead = count_message_tokens(
+        [SystemMessage(content=system_prompt), HumanMessage(content="")], model
     )
-    logging.info(f"Created facts and summary with LLM, size: {len(result.content)}")
-    return result.content
+    return get_context_window(model) - COMPLETION_TOKENS_RESERVE - prompt_overhead
 
 
 def truncate_to_context_window(
-    text: str, context_window_char_len: int = MAX_NUMBER_OF_CHARACTERS_IN_CONTEXT_WINDOW
+    text: str, system_prompt: str, model: str = llm_model
 ) -> str:
     """
-    Truncate input text to fit within the context window for LLM.
+    Truncate input text so that it fits in the context window with its system prompt.
 
     Args:
         text (str): Input text to truncate.
-        context_window_char_len (int): Maximum length of context window.
+        system_prompt (str): System prompt sent with the text.
+        model (str): Name of the chat model.
 
     Returns:
         str: Truncated text.
     """
-    if len(text) > context_window_char_len:
+    max_tokens = get_prompt_token_budget(system_prompt, model)
+    n_tokens = count_tokens(text, model)
+
+    if n_tokens > max_tokens:
         logging.error(
-            f"For LLM prompt, Text len: {len(text)} exceeds MAX_NUMBER_OF_CHARACTERS_IN_CONTEXT_WINDOW: {MAX_NUMBER_OF_CHARACTERS_IN_CONTEXT_WINDOW}. Truncating input."
+            f"For LLM prompt, Text tokens: {n_tokens} exceed token budget: {max_tokens}. Truncating input."
         )
-        text = text[:context_window_char_len]
+        text = truncate_to_tokens(text, max_tokens, model)
     else:
-        logging.info(f"For LLM prompt, Text len: {len(text)} is within context window.")
+        logging.info(
+            f"For LLM prompt, Text tokens: {n_tokens} are within token budget: {max_tokens}."
+        )
     return text
 
 
+def split_company_text(text: str, system_prompt: str) -> Optional[List[str]]:
+    """
+    Split a company text into parts for map-reduce summarization if it does not fit the context window.
+
+    Args:
+        text (str): Company text.
+        system_prompt (str): System prompt the text would be sent with in one call.
+
+    Returns:
+        Optional[List[str]]: Parts of the text, None if it fits in one call.
+    """
+    n_tokens = count_tokens(text, llm_model)
+    if n_tokens <= get_prompt_token_budget(system_prompt):
+        return None
+
+    max_tokens = min(
+        SUMMARY_PART_MAX_TOKENS,
+        get_prompt_token_budget(COMPANY_PART_SUMMARY_SYSTEM_PROMPT),
+    )
+    parts = split_to_tokens(text, max_tokens, llm_model)
+    logging.info(
+        f"Company text tokens: {n_tokens} exceed context window, summarizing {len(parts)} parts"
+    )
+    return parts
+
+
 def get_company_facts_and_summary(text: str) -> str:
     """
     Generate company facts and summary using LLM.
 
+    Texts larger than the context window are summarized with map-reduce: the
+    text is split into token-bounded parts summarized concurrently, and the
+    partial summaries are combined into the final facts and summary, again in
+    at most MAX_REDUCE_ROUNDS rounds if they do not fit in one call.
+
     Args:
         text (str): Input text to generate company facts and summary.
 
     Returns:
         str: Generated company facts and summary.
     """
-    text = truncate_to_context_window(text)
-    company_facts_and_summary = get_facts_and_summary(
-        text, COMPANY_SUMMARY_SYSTEM_PROMPT
-    )
-    return company_facts_and_summary
+    parts = split_company_text(text, COMPANY_SUMMARY_SYSTEM_PROMPT)
+    if parts is None:
+        return get_facts_and_summary(text, COMPANY_SUMMARY_SYSTEM_PROMPT)
+
+    with ThreadPoolExecutor(max_workers=SUMMARY_MAX_CONCURRENCY) as executor:
+        for reduce_round in range(1, MAX_REDUCE_ROUNDS + 1):
+            logging.info(f"Summarizing {len(parts)} parts, round: {reduce_round}")
+            part_summaries = list(
+                executor.map(
+                    lambda part: get_facts_and_summary(
+                        part, COMPANY_PART_SUMMARY_SYSTEM_PROMPT
+                    ),
+                    parts,
+                )
+            )
+            text = "\n\n".join(part_summaries)
+            parts = split_company_text(text, COMPANY_SUMMARY_REDUCE_SYSTEM_PROMPT)
+            if parts is None:
+                break
+        else:
+            logging.warning(
+                f"Partial summaries still exceed the context window after {MAX_REDUCE_ROUNDS} rounds"
+            )
+            text = truncate_to_context_window(
+                text, COMPANY_SUMMARY_REDUCE_SYSTEM_PROMPT
+            )
+
+    return get_facts_and_summary(text, COMPANY_SUMMARY_REDUCE_SYSTEM_PROMPT)
+
+
+async def aget_company_facts_and_summary(text: str) -> str:
+    """
+    Async version of get_company_facts_and_summary, run in a worker thread.
+
+    Args:
+        text (str): Input text to generate company facts and summary.
+
+    Returns:
+        str: Generated company facts and summary.
+    """
+    return await asyncio.to_thread(get_company_facts_and_summary, text)
 
 
 def get_lead_facts_and_summary(path: str, text: str, user_id: str) -> str:
@@ -147,6 +277,7 @@ def get_lead_facts_and_summary(path: str, text: str, user_id: str) -> str:
     """
     user_folder = os.path.join(path, user_id)
     if not os.path.exists(os.path.join(user_folder, LEAD_SUMMARY_AND_FACTS_FILENAME)):
+        text = truncate_to_context_window(text, LEAD_SUMMARY_SYSTEM_PROMPT)
         lead_facts_and_summary = get_facts_and_summary(text, LEAD_SUMMARY_SYSTEM_PROMPT)
         save_lead_summary_and_facts(user_folder, lead_facts_and_summary)
         logging.info("Created lead_facts_and_summary")
@@ -194,33 +325,187 @@ def get_faiss_foldername(path: str) -> str:
     return os.path.join(path, RAG_FOLDER_NAME, FAISS_FOLDER_NAME)
 
 
-def create_vector_db(path: str) -> object:
+def load_website_documents(path: str) -> List["Document"]:
     """
-    Create FAISS vector database from documents.
+    Load the scraped website as documents, one per page with its URL as source.
+
+    Blocks repeated across pages are kept only on the first page they appear on.
+    Folders scraped before page records were introduced are loaded from the website text file.
 
     Args:
         path (str): Path to the base directory.
 
     Returns:
-        object: FAISS vector database object.
+        List[Document]: Website documents.
+    """
+    from langchain_community.document_loaders import TextLoader
+    from langchain_core.documents import Document
+
+    if not page_records_exist(path):
+        website_txt_path = os.path.join(path, WEBSITE_INFO_FILENAME)
+        loader = TextLoader(website_txt_path)
+        return loader.load()
+
+    # Pages in URL order, so that repeated blocks always stay on the same page
+    page_texts = remove_repeated_blocks(dict(sorted(read_page_texts(path).items())))
+    return [
+        Document(page_content=text, metadata={"source": url})
+        for url, text in page_texts.items()
+        if text.strip()
+    ]
+
+
+def get_embeddings() -> "CachedEmbeddings":
     """
-    website_txt_path = os.path.join(path, WEBSITE_INFO_FILENAME)
-    loader = TextLoader(website_txt_path)
-    documents = loader.load()
+    Get the embedding model, backed by the persistent embedding cache.
+
+    Returns:
+        CachedEmbeddings: Cached OpenAI embeddings.
+    """
+    from src.embedding_cache import CachedEmbeddings
+
+    embeddings = get_embedding_model()
+    return CachedEmbeddings(embeddings, embeddings.model)
+
+
+def get_website_chunks(path: str) -> Dict[str, "Document"]:
+    """
+    Split the scraped website into chunks keyed by the hash of their content.
+
+    Identical chunks are kept once.
+
+    Args:
+        path (str): Path to the base directory.
+
+    Returns:
+        Dict[str, Document]: Website chunks keyed by content hash.
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    documents = load_website_documents(path)
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
     )
     docs = text_splitter.split_documents(documents)
-    embeddings = OpenAIEmbeddings()
 
-    db = FAISS.from_documents(docs, embeddings)
-    logging.info(f"Created FAISS vector db, #chunks: {db.index.ntotal}")
+    return {get_content_hash(doc.page_content): doc for doc in docs}
+
+
+def get_pages_fingerprint(path: str) -> str:
+    """
+    Compute a hash of the URLs and content hashes of all saved pages.
+
+    Args:
+        path (str): Path to the base directory.
+
+    Returns:
+        str: Fingerprint of the saved pages.
+    """
+    pages_index = read_pages_index(path)
+    page_hashes = {url: page["content_hash"] for url, page in pages_index.items()}
+    return get_content_hash(json.dumps(page_hashes, sort_keys=True))
+
+
+def save_vector_db(db: "FAISS", path: str) -> None:
+    """
+    Save FAISS vector database to disk together with the fingerprint of the indexed pages.
+
+    Args:
+        db (FAISS): FAISS vector database object.
+        path (str): Path to the base directory.
+    """
     faiss_folder_name = get_faiss_foldername(path)
     db.save_local(faiss_folder_name)
+
+    if page_records_exist(path):
+        save_txt(faiss_folder_name, INDEXED_PAGES_FILENAME, get_pages_fingerprint(path))
+
     logging.info(f"FAISS vector db saved at: {faiss_folder_name}")
+
+
+def create_vector_db(path: str) -> object:
+    """
+    Create FAISS vector database from documents.
+
+    Args:
+        path (str): Path to the base directory.
+
+    Returns:
+        object: FAISS vector database object.
+    """
+    from src.embedding_pipeline import add_documents_in_batches
+
+    chunks = get_website_chunks(path)
+    if not chunks:
+        raise ValueError(f"No website text to index in: {path}")
+
+    db = add_documents_in_batches(None, chunks, get_embeddings())
+    logging.info(f"Created FAISS vector db, #chunks: {db.index.ntotal}")
+    save_vector_db(db, path)
     return db
 
 
+def update_vector_db(path: str) -> object:
+    """
+    Bring the saved FAISS vector database in line with the saved pages.
+
+    Only chunks whose content hash is not in the index yet are embedded, and
+    vectors of chunks that no longer exist are deleted.
+
+    Args:
+        path (str): Path to the base directory.
+
+    Returns:
+        object: FAISS vector database object.
+    """
+    from src.embedding_pipeline import add_documents_in_batches
+
+    db = load_vector_db(path)
+    chunks = get_website_chunks(path)
+
+    indexed_ids = set(db.index_to_docstore_id.values())
+    removed_ids = [chunk_id for chunk_id in indexed_ids if chunk_id not in chunks]
+    new_ids = [chunk_id for chunk_id in chunks if chunk_id not in indexed_ids]
+
+    if removed_ids:
+        db.delete(removed_ids)
+    if new_ids:
+        add_documents_in_batches(
+            db, {chunk_id: chunks[chunk_id] for chunk_id in new_ids}, get_embeddings()
+        )
+
+    logging.info(
+        f"Updated FAISS vector db, #chunks: {db.index.ntotal}, "
+        f"embedded: {len(new_ids)}, deleted: {len(removed_ids)}"
+    )
+    save_vector_db(db, path)
+    return db
+
+
+def vector_db_is_up_to_date(path: str) -> bool:
+    """
+    Check whether the saved FAISS vector database indexes the current saved pages.
+
+    Folders scraped before page records were introduced are always considered up to date.
+
+    Args:
+        path (str): Path to the base directory.
+
+    Returns:
+        bool: True if the index does not need an update.
+    """
+    if not page_records_exist(path):
+        return True
+
+    faiss_folder_name = get_faiss_foldername(path)
+    if not os.path.exists(os.path.join(faiss_folder_name, INDEXED_PAGES_FILENAME)):
+        return False
+
+    return read_txt(faiss_folder_name, INDEXED_PAGES_FILENAME) == get_pages_fingerprint(
+        path
+    )
+
+
 def load_vector_db(path: str) -> object:
     """
     Load FAISS vector database from disk.
@@ -231,8 +516,10 @@ def load_vector_db(path: str) -> object:
     Returns:
         object: FAISS vector database object.
     """
+    from langchain_community.vectorstores import FAISS
+
     rag_storage_folder = get_faiss_foldername(path)
-    embeddings = OpenAIEmbeddings()
+    embeddings = get_embeddings()
     db = FAISS.load_local(
         rag_storage_folder, embeddings, allow_dangerous_deserialization=True
     )
@@ -242,7 +529,7 @@ def load_vector_db(path: str) -> object:
 
 def create_or_get_vector_db(path: str) -> object:
     """
-    Create or load FAISS vector database.
+    Create or load FAISS vector database, updating it if the saved pages changed.
 
     Args:
         path (str): Path to the base directory.
@@ -252,25 +539,31 @@ def create_or_get_vector_db(path: str) -> object:
     """
     rag_storage_folder = get_faiss_foldername(path)
 
-    if os.path.exists(rag_storage_folder):
-        db = load_vector_db(path)
-    else:
+    if not os.path.exists(rag_storage_folder):
         db = create_vector_db(path)
+    elif not vector_db_is_up_to_date(path):
+        db = update_vector_db(path)
+    else:
+        db = load_vector_db(path)
     return db
 
 
-def get_rag_chunks(user_information: str, path: str) -> List[str]:
+def get_rag_chunks(
+    user_information: str, path: str, db: Optional["FAISS"] = None
+) -> List[str]:
     """
     Get relevant RAG chunks for the user.
 
     Args:
         user_information (str): User information for RAG retrieval.
         path (str): Path to the base directory.
+        db (Optional[FAISS]): Already loaded FAISS vector database, loaded from path if None.
 
     Returns:
         List[str]: List of relevant RAG chunks.
     """
-    db = create_or_get_vector_db(path)
+    if db is None:
+        db = create_or_get_vector_db(path)
 
     docs = db.similarity_search(user_information, k=6)
     selected_chunks = filter_chunks(docs)
@@ -280,6 +573,66 @@ def get_rag_chunks(user_information: str, path: str) -> List[str]:
     return selected_chunks
 
 
+def build_personalized_message_prompt(
+    company_facts_and_summary: str,
+    lead_facts_and_summary: str,
+    rag_chunks: List[str],
+    style: str,
+    additional_notes: str,
+    model: str = llm_model,
+) -> str:
+    """
+    Build the prompt asking the LLM for a personalized message.
+
+    RAG chunks are added in order of relevance as long as the prompt fits in
+    the context window of the model.
+
+    Args:
+        company_facts_and_summary (str): Company facts and summary.
+        lead_facts_and_summary (str): Lead facts and summary.
+        rag_chunks (List[str]): Company chunks relevant to the lead, most relevant first.
+        style (str): Style of the personalized message.
+        additional_notes (str): Additional notes for the message.
+        model (str): Name of the chat model.
+
+    Returns:
+        str: Prompt for the LLM.
+    """
+    from langchain_core.prompts import PromptTemplate
+
+    prompt_template = PromptTemplate.from_template(PERSONALIZED_MESSAGE_PROMPT)
+
+    def format_prompt(chunks: List[str]) -> str:
+        return prompt_template.format(
+            company_facts_and_summary=company_facts_and_summary,
+            lead_facts_and_summary=lead_facts_and_summary,
+            rag_chunks=chunks,
+            style=style,
+            additional_notes=additional_notes,
+        )
+
+    max_tokens = get_prompt_token_budget("", model)
+    selected_chunks = []
+    prompt = format_prompt(selected_chunks)
+    n_tokens = count_tokens(prompt, model)
+
+    for chunk in rag_chunks:
+        candidate_prompt = format_prompt(selected_chunks + [chunk])
+        candidate_tokens = count_tokens(candidate_prompt, model)
+        if candidate_tokens > max_tokens:
+            break
+        selected_chunks.append(chunk)
+        prompt, n_tokens = candidate_prompt, candidate_tokens
+
+    if len(selected_chunks) < len(rag_chunks):
+        logging.warning(
+            f"Dropped {len(rag_chunks) - len(selected_chunks)} RAG chunks to fit token budget: {max_tokens}"
+        )
+
+    logging.info(f"Prompt tokens: {n_tokens}, prompt: {prompt}")
+    return prompt
+
+
 def get_personalized_message(
     path: str,
     user_id: str,
@@ -287,6 +640,7 @@ def get_personalized_message(
     lead_facts_and_summary: str,
     style: str,
     additional_notes: str,
+    db: Optional["FAISS"] = None,
 ) -> str:
     """
     Generate personalized message using LLM.
@@ -298,27 +652,25 @@ def get_personalized_message(
         lead_facts_and_summary (str): Lead facts and summary.
         style (str): Style of the personalized message.
         additional_notes (str): Additional notes for the message.
+        db (Optional[FAISS]): Already loaded FAISS vector database of the company.
 
     Returns:
         str: Generated personalized message.
     """
-    prompt_template = PromptTemplate.from_template(PERSONALIZED_MESSAGE_PROMPT)
-    model = ChatOpenAI(model=llm_model, temperature=0.5)
-
-    rag_chunks = get_rag_chunks(lead_facts_and_summary, path)
+    from langchain_core.messages import SystemMessage
 
-    prompt = prompt_template.format(
-        company_facts_and_summary=company_facts_and_summary,
-        lead_facts_and_summary=lead_facts_and_summary,
-        rag_chunks=rag_chunks,
-        style=style,
-        additional_notes=additional_notes,
-    )
+    model = get_chat_model(llm_model, 0.5)
 
-    logging.info(f"Prompt: {prompt}")
-    result = model.invoke([SystemMessage(content=prompt)])
+    rag_chunks = get_rag_chunks(lead_facts_and_summary, path, db)
 
-    personalized_message = result.content
+    prompt = build_personalized_message_prompt(
+        company_facts_and_summary,
+        lead_facts_and_summary,
+        rag_chunks,
+        style,
+        additional_notes,
+    )
+    personalized_message = invoke_with_cache(model, [SystemMessage(content=prompt)])
 
     logging.info(
         f"Created personalized message with LLM, size: {len(personalized_message)}"
@@ -327,3 +679,39 @@ def get_personalized_message(
     user_folder = os.path.join(path, user_id)
     save_lead_personalized_message(user_folder, personalized_message)
     return personalized_message
+
+
+async def aget_personalized_message(
+    path: str,
+    user_id: str,
+    company_facts_and_summary: str,
+    lead_facts_and_summary: str,
+    style: str,
+    additional_notes: str,
+    db: Optional["FAISS"] = None,
+) -> str:
+    """
+    Async version of get_personalized_message, run in a worker thread.
+
+    Args:
+        path (str): Path to the company's folder.
+        user_id (str): User ID to identify the user.
+        company_facts_and_summary (str): Company facts and summary.
+        lead_facts_and_summary (str): Lead facts and summary.
+        style (str): Style of the personalized message.
+        additional_notes (str): Additional notes for the message.
+        db (Optional[FAISS]): Already loaded FAISS vector database of the company.
+
+    Returns:
+        str: Generated personalized message.
+    """
+    return await asyncio.to_thread(
+        get_personalized_message,
+        path,
+        user_id,
+        company_facts_and_summary,
+        lead_facts_and_summary,
+        style,
+        additional_notes,
+        db,
+    )
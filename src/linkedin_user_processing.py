@@ -1,28 +1,163 @@
 from dotenv import load_dotenv, find_dotenv
 import os
-from linkedin_api import Linkedin
+import random
+import threading
+import time
 import logging
-from src.utils import save_lead_summary, read_lead_summary, LEAD_SUMMARY_FILENAME
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+from src.utils import (
+    save_lead_summary,
+    read_lead_summary,
+    LEAD_SUMMARY_FILENAME,
+    RELATIVE_FOLDER,
+)
+
+if TYPE_CHECKING:
+    from linkedin_api import Linkedin
 
 # Load environment variables from .env file
 _ = load_dotenv(find_dotenv())
 
-# Authenticate using LinkedIn account credentials
-api = Linkedin(os.environ["LINKEDIN_LOGIN"], os.environ["LINKEDIN_PASSWORD"])
+# Session cookies are saved here and reused by later runs instead of logging in again;
+# linkedin_api expects the trailing separator
+LINKEDIN_COOKIES_FOLDER = os.path.join(RELATIVE_FOLDER, "linkedin_cookies", "")
+
+# LinkedIn client, authenticated on first use so that cached leads never log in
+_api: Optional["Linkedin"] = None
+_api_lock = threading.Lock()
+
+# Maximum number of leads fetched from LinkedIn at the same time
+LINKEDIN_MAX_CONCURRENCY = 2
+linkedin_semaphore = threading.BoundedSemaphore(LINKEDIN_MAX_CONCURRENCY)
+
+# Minimum time between the starts of two LinkedIn requests across all threads,
+# plus a random jitter so that requests do not follow a regular pattern
+LINKEDIN_MIN_INTERVAL_SECONDS = 0.5
+LINKEDIN_MAX_JITTER_SECONDS = 0.5
+_next_request_time = 0.0
+_rate_limit_lock = threading.Lock()
+
+# One lock per lead folder, so that a lead is never fetched twice at the same time
+_user_locks: Dict[str, threading.Lock] = {}
+_user_locks_lock = threading.Lock()
+
+
+def get_linkedin_api() -> "Linkedin":
+    """
+    Get the LinkedIn client shared by all requests, authenticating on the first call.
+
+    The session cookies saved by a previous run are reused while they are valid,
+    so a full login only happens when there is no saved session or it expired.
+    linkedin_api saves the cookies of a new session itself, right after the login.
+
+    Returns:
+        Linkedin: Authenticated LinkedIn client.
+    """
+    global _api
+
+    with _api_lock:
+        if _api is None:
+            from linkedin_api import Linkedin
+            from linkedin_api.cookie_repository import LinkedinSessionExpired
+
+            username = os.environ["LINKEDIN_LOGIN"]
+            password = os.environ["LINKEDIN_PASSWORD"]
+
+            try:
+                _api = Linkedin(username, password, cookies_dir=LINKEDIN_COOKIES_FOLDER)
+            except LinkedinSessionExpired:
+                logging.info("Saved LinkedIn session expired, logging in again")
+                _api = Linkedin(
+                    username,
+                    password,
+                    refresh_cookies=True,
+                    cookies_dir=LINKEDIN_COOKIES_FOLDER,
+                )
+            logging.info("Authenticated LinkedIn client")
+
+    return _api
+
+
+def wait_for_rate_limit() -> None:
+    """
+    Wait until the next LinkedIn request is allowed to start.
+
+    Requests of all threads are spaced by LINKEDIN_MIN_INTERVAL_SECONDS plus a
+    random jitter of up to LINKEDIN_MAX_JITTER_SECONDS.
+    """
+    global _next_request_time
+
+    with _rate_limit_lock:
+        now = time.monotonic()
+        start_time = max(now, _next_request_time)
+        _next_request_time = (
+            start_time
+            + LINKEDIN_MIN_INTERVAL_SECONDS
+            + random.uniform(0, LINKEDIN_MAX_JITTER_SECONDS)
+        )
+
+    if start_time > now:
+        time.sleep(start_time - now)
+
+
+def call_linkedin(
+    name: str, user_id: str, func: Callable[..., Any], *args, **kwargs
+) -> Any:
+    """
+    Call the LinkedIn API within the global rate limit and log its latency.
+
+    Args:
+        name (str): Name of the call, used in logs.
+        user_id (str): LinkedIn user ID the call is about.
+        func (Callable[..., Any]): LinkedIn client method.
+        *args: Positional arguments of the method.
+        **kwargs: Keyword arguments of the method.
+
+    Returns:
+        Any: Result of the method.
+    """
+    wait_for_rate_limit()
+
+    start_time = time.monotonic()
+    result = func(*args, **kwargs)
+    logging.info(
+        f"LinkedIn {name} for {user_id} done in {time.monotonic() - start_time:.2f}s"
+    )
+
+    return result
 
 
 def extract_user_info(user_id: str) -> str:
     """
     Extract user information and recent posts from LinkedIn using the LinkedIn API.
 
+    The profile and the posts are requested at the same time.
+
     Args:
         user_id (str): LinkedIn user ID.
 
     Returns:
         str: Concatenated string of user information and posts.
     """
-    # Retrieve basic profile information
-    profile = api.get_profile(user_id)
+    api = get_linkedin_api()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        profile_future = executor.submit(
+            call_linkedin, "get_profile", user_id, api.get_profile, user_id
+        )
+        posts_future = executor.submit(
+            call_linkedin,
+            "get_profile_posts",
+            user_id,
+            api.get_profile_posts,
+            user_id,
+            post_count=10,
+        )
+        profile = profile_future.result()
+        profile_posts = posts_future.result()
+
+    # Basic profile information
     useful_keys = [
         "summary",
         "industryName",
@@ -42,8 +177,7 @@ def extract_user_info(user_id: str) -> str:
         f"Retrieved user information from LinkedIn, character length: {len(lead_information)}"
     )
 
-    # Retrieve recent posts from user's profile
-    profile_posts = api.get_profile_posts(user_id, post_count=10)
+    # Recent posts from user's profile
     posts = "Posts:\n" + "\n\n".join(
         [post.get("commentary").get("text").get("text") for post in profile_posts]
     )
@@ -55,6 +189,20 @@ def extract_user_info(user_id: str) -> str:
     return user_info
 
 
+def get_user_lock(user_folder: str) -> threading.Lock:
+    """
+    Get the lock of a lead folder.
+
+    Args:
+        user_folder (str): Folder of the lead.
+
+    Returns:
+        threading.Lock: Lock of the folder.
+    """
+    with _user_locks_lock:
+        return _user_locks.setdefault(user_folder, threading.Lock())
+
+
 def get_user_info(path: str, user_id: str) -> str:
     """
     Retrieve user information and save it to a local file if not already cached.
@@ -69,11 +217,44 @@ def get_user_info(path: str, user_id: str) -> str:
     user_folder = os.path.join(path, user_id)
     os.makedirs(user_folder, exist_ok=True)
 
-    # Check if user information has been cached locally
-    if not os.path.exists(os.path.join(user_folder, LEAD_SUMMARY_FILENAME)):
-        user_info = extract_user_info(user_id)
-        save_lead_summary(user_folder, user_info)
-    else:
-        user_info = read_lead_summary(user_folder)
+    # A lead being prefetched by another thread is waited for instead of fetched again
+    with get_user_lock(user_folder):
+        # Check if user information has been cached locally
+        if not os.path.exists(os.path.join(user_folder, LEAD_SUMMARY_FILENAME)):
+            with linkedin_semaphore:
+                user_info = extract_user_info(user_id)
+            save_lead_summary(user_folder, user_info)
+        else:
+            user_info = read_lead_summary(user_folder)
 
     return user_info
+
+
+def prefetch_user_info(
+    leads: List[Tuple[str, str]], max_workers: int = LINKEDIN_MAX_CONCURRENCY
+) -> None:
+    """
+    Fetch and save the LinkedIn information of many leads ahead of the message stage.
+
+    Leads already saved are skipped. Errors are logged and left to the message
+    stage, which fetches the lead again.
+
+    Args:
+        leads (List[Tuple[str, str]]): (path, user_id) pairs of the leads.
+        max_workers (int): Maximum number of leads fetched at the same time.
+    """
+    start_time = time.monotonic()
+
+    def prefetch_one(lead: Tuple[str, str]) -> None:
+        path, user_id = lead
+        try:
+            get_user_info(path, user_id)
+        except Exception as e:
+            logging.error(f"Error prefetching LinkedIn lead {user_id}: {e}")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(prefetch_one, leads))
+
+    logging.info(
+        f"Prefetched {len(leads)} LinkedIn leads in {time.monotonic() - start_time:.2f}s"
+    )
@@ -0,0 +1,247 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional
+
+from src.rate_limiter import call_with_rate_limit, get_chat_rate_limiter
+from src.tokens import count_message_tokens, count_tokens
+from src.utils import RELATIVE_FOLDER
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+    from langchain_openai import ChatOpenAI
+
+LLM_CACHE_FOLDER = os.path.join(RELATIVE_FOLDER, "llm_cache")
+
+# Oldest responses are evicted once the cache grows past this size, in bytes
+LLM_CACHE_MAX_BYTES = 100 * 1024 * 1024
+
+# Eviction frees space down to this share of the maximum size
+LLM_CACHE_EVICTION_TARGET = 0.9
+
+# Maximum number of LLM calls in flight across all threads
+LLM_MAX_CONCURRENCY = 8
+llm_semaphore = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+# Completion tokens counted against the budget when the model has no max_tokens
+DEFAULT_COMPLETION_TOKENS = 1_000
+
+
+def get_cache_key(model: str, temperature: float, messages: List["BaseMessage"]) -> str:
+    """
+    Compute the cache key of an LLM call.
+
+    Args:
+        model (str): Name of the model.
+        temperature (float): Sampling temperature.
+        messages (List[BaseMessage]): Full list of messages sent to the model.
+
+    Returns:
+        str: Hex digest identifying the call.
+    """
+    payload = {
+        "model": model,
+        "temperature": temperature,
+        "messages": [
+            {"type": message.type, "content": message.content} for message in messages
+        ],
+    }
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def get_completion_token_budget(chat: "ChatOpenAI") -> int:
+    """
+    Get the completion tokens an LLM call counts against the tokens-per-minute budget.
+
+    Args:
+        chat (ChatOpenAI): Chat model.
+
+    Returns:
+        int: Maximum number of completion tokens.
+    """
+    return chat.max_tokens or DEFAULT_COMPLETION_TOKENS
+
+
+def log_token_usage(
+    chat: "ChatOpenAI", result: "BaseMessage", prompt_tokens: int
+) -> None:
+    """
+    Log the tokens used by an LLM call, as reported by the API when available.
+
+    Args:
+        chat (ChatOpenAI): Chat model.
+        result (BaseMessage): Response of the model.
+        prompt_tokens (int): Prompt tokens counted before the call.
+    """
+    usage = getattr(result, "usage_metadata", None)
+    if usage:
+        prompt_tokens = usage["input_tokens"]
+        completion_tokens = usage["output_tokens"]
+    else:
+        completion_tokens = count_tokens(result.content, chat.model_name)
+
+    logging.info(
+        f"LLM call, model: {chat.model_name}, prompt tokens: {prompt_tokens}, completion tokens: {completion_tokens}"
+    )
+
+
+class LLMCache:
+    def __init__(self, folder: str, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        """
+        Initialize a persistent cache of LLM responses with size-based eviction.
+
+        Every response is stored in its own file. Reading a response refreshes
+        its modification time, so eviction removes the least recently used ones.
+
+        Args:
+            folder (str): Folder of the cache.
+            max_bytes (int): Maximum total size of the cached responses.
+        """
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total_bytes = None
+
+        os.makedirs(folder, exist_ok=True)
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.folder, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached response.
+
+        Args:
+            key (str): Cache key of the call.
+
+        Returns:
+            Optional[str]: Cached response content, None if not cached.
+        """
+        path = self.get_path(key)
+        try:
+            with open(path, "r") as json_file:
+                content = json.load(json_file)["content"]
+            os.utime(path)
+            return content
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+    def set(self, key: str, content: str) -> None:
+        """
+        Store a response, evicting the least recently used ones if the cache is full.
+
+        Args:
+            key (str): Cache key of the call.
+            content (str): Response content.
+        """
+        path = self.get_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as json_file:
+            json.dump({"content": content}, json_file)
+        size = os.path.getsize(tmp_path)
+
+        with self.lock:
+            # An overwritten response no longer counts towards the total size
+            try:
+                old_size = os.path.getsize(path)
+            except FileNotFoundError:
+                old_size = 0
+            os.replace(tmp_path, path)
+
+            if self.total_bytes is None:
+                self.total_bytes = self.get_folder_size()
+            else:
+                self.total_bytes += size - old_size
+
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    def get_folder_size(self) -> int:
+        return sum(
+            entry.stat().st_size
+            for entry in os.scandir(self.folder)
+            if entry.name.endswith(".json")
+        )
+
+    def evict(self) -> None:
+        """
+        Remove least recently used responses until the cache is below its eviction target.
+        """
+        entries = sorted(
+            (
+                entry
+                for entry in os.scandir(self.folder)
+                if entry.name.endswith(".json")
+            ),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        self.total_bytes = sum(entry.stat().st_size for entry in entries)
+        target_bytes = self.max_bytes * LLM_CACHE_EVICTION_TARGET
+        n_evicted = 0
+
+        for entry in entries:
+            if self.total_bytes <= target_bytes:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            self.total_bytes -= size
+            n_evicted += 1
+
+        logging.info(
+            f"Evicted {n_evicted} LLM responses from cache, size: {self.total_bytes}"
+        )
+
+
+@lru_cache(maxsize=None)
+def get_llm_cache(folder: str = LLM_CACHE_FOLDER) -> LLMCache:
+    """
+    Get the LLM response cache of a folder, shared by all callers in the process.
+
+    Args:
+        folder (str): Folder of the cache.
+
+    Returns:
+        LLMCache: LLM response cache.
+    """
+    return LLMCache(folder)
+
+
+def invoke_with_cache(chat: "ChatOpenAI", messages: List["BaseMessage"]) -> str:
+    """
+    Invoke a chat model, returning the cached response if the same call was made before.
+
+    Calls to the model wait for the shared chat rate limits and retry rate-limited requests.
+
+    Args:
+        chat (ChatOpenAI): Chat model.
+        messages (List[BaseMessage]): Messages to send.
+
+    Returns:
+        str: Response content.
+    """
+    cache = get_llm_cache()
+    key = get_cache_key(chat.model_name, chat.temperature, messages)
+
+    content = cache.get(key)
+    if content is not None:
+        logging.info(f"LLM response read from cache, model: {chat.model_name}")
+        return content
+
+    prompt_tokens = count_message_tokens(messages, chat.model_name)
+    tokens = prompt_tokens + get_completion_token_budget(chat)
+    with llm_semaphore:
+        result = call_with_rate_limit(
+            get_chat_rate_limiter(), tokens, chat.invoke, messages
+        )
+    log_token_usage(chat, result, prompt_tokens)
+    cache.set(key, result.content)
+
+    return result.content
@@ -0,0 +1,71 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+# Time allowed for one OpenAI request, in seconds
+LLM_REQUEST_TIMEOUT_SECONDS = 120
+
+# Number of retries of failed OpenAI requests done by the client itself; retries
+# are done by src.rate_limiter instead, so they also wait for the rate limits
+LLM_MAX_RETRIES = 0
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-ada-002"
+
+
+@lru_cache(maxsize=None)
+def get_chat_model(
+    model: str,
+    temperature: float,
+    timeout: float = LLM_REQUEST_TIMEOUT_SECONDS,
+    max_retries: int = LLM_MAX_RETRIES,
+) -> "ChatOpenAI":
+    """
+    Get the shared chat model client for a model and temperature.
+
+    Clients are created once per configuration and reused by every caller, so
+    their HTTP connection pool is shared. Only sync calls are made with them, as
+    the async client would keep connections bound to the event loop it first ran
+    in; async callers run the sync calls in worker threads. langchain_openai is only imported on the first call, and the API key is
+    read from the environment at that point.
+
+    Args:
+        model (str): Name of the chat model.
+        temperature (float): Sampling temperature.
+        timeout (float): Time allowed for one request, in seconds.
+        max_retries (int): Number of retries of failed requests.
+
+    Returns:
+        ChatOpenAI: Shared chat model client.
+    """
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        timeout=timeout,
+        max_retries=max_retries,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_embedding_model(
+    model: str = DEFAULT_EMBEDDING_MODEL,
+    timeout: float = LLM_REQUEST_TIMEOUT_SECONDS,
+    max_retries: int = LLM_MAX_RETRIES,
+) -> "OpenAIEmbeddings":
+    """
+    Get the shared embedding model client.
+
+    Args:
+        model (str): Name of the embedding model.
+        timeout (float): Time allowed for one request, in seconds.
+        max_retries (int): Number of retries of failed requests.
+
+    Returns:
+        OpenAIEmbeddings: Shared embedding model client.
+    """
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(model=model, timeout=timeout, max_retries=max_retries)
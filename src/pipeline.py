@@ -0,0 +1,64 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Tuple
+
+# A stage is a function and the names of the stages whose results it takes as arguments
+Stage = Tuple[Callable[..., Any], List[str]]
+
+
+def run_pipeline(stages: Dict[str, Stage], max_workers: int = 4) -> Dict[str, Any]:
+    """
+    Run a dependency graph of stages, running independent stages in parallel.
+
+    Every stage starts as soon as all of its dependencies are done, and gets
+    their results as positional arguments in the order they are listed.
+
+    Args:
+        stages (Dict[str, Stage]): Stages keyed by name.
+        max_workers (int): Maximum number of stages running at the same time.
+
+    Returns:
+        Dict[str, Any]: Result of every stage, keyed by name.
+
+    Raises:
+        ValueError: If a stage depends on an unknown stage or the graph has a cycle.
+        Exception: The first exception raised by a stage; stages not started yet are skipped.
+    """
+    for name, (_, dependencies) in stages.items():
+        for dependency in dependencies:
+            if dependency not in stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dependency}")
+
+    results = {}
+    pending = dict(stages)
+    running: Dict[Future, str] = {}
+    start_times = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            ready = [
+                name
+                for name, (_, dependencies) in pending.items()
+                if all(dependency in results for dependency in dependencies)
+            ]
+            for name in ready:
+                func, dependencies = pending.pop(name)
+                args = [results[dependency] for dependency in dependencies]
+                start_times[name] = time.monotonic()
+                running[executor.submit(func, *args)] = name
+
+            if not running:
+                raise ValueError(
+                    f"Stages with unresolvable dependencies: {list(pending)}"
+                )
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                logging.info(
+                    f"Pipeline stage {name} done in {time.monotonic() - start_times[name]:.2f}s"
+                )
+
+    return results
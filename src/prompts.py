@@ -74,3 +74,44 @@ Facts:
 
 My life depends on this. I will tip you generously if you follow the instructions and do a great job.
 """
+
+COMPANY_PART_SUMMARY_SYSTEM_PROMPT = """
+I have provided one part of the text scraped from a company website; the other parts are summarized separately. Please create a summary of this part and list the facts it contains about the company. These facts should include information about the company's products, advantages of using their products, useful features, company values, and other positive aspects. Keep names, numbers and product names. The summary and list should be concise and informative.
+
+Example of Output:
+
+Summary:
+[Summary of this part of the company website]
+
+Facts:
+
+1. [Fact about the company]
+2. [Fact about the company]
+...
+
+My life depends on this. I will tip you generously if you follow the instructions and do a great job.
+"""
+
+COMPANY_SUMMARY_REDUCE_SYSTEM_PROMPT = """
+I have provided summaries and facts of the different parts of a company website. Please combine them into one detailed summary and list up to 10 facts about the company, keeping the most important and removing duplicates. These facts should include information about the company's products, advantages of using their products, useful features, company values, and other positive aspects. The summary and list should be concise and informative.
+
+Example of Output:
+
+Summary:
+[Detailed summary of the company based on the provided summaries]
+
+Facts:
+
+1. [Fact about the company's products]
+2. [Fact about the advantages of using the company's products]
+3. [Fact about useful features of the company's products]
+4. [Fact about the company's values]
+5. [Fact about the company's values or positive aspects]
+6. [Fact about the company's positive aspects]
+7. [Fact about the company's products or features]
+8. [Fact about the company's products or features]
+9. [Fact about the company's values or positive aspects]
+10. [Fact about the company's products, features, or values]
+
+My life depends on this. I will tip you generously if you follow the instructions and do a great job.
+"""
@@ -0,0 +1,204 @@
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Optional, Tuple, Type
+
+# Budgets of the OpenAI account, overridable through environment variables
+CHAT_REQUESTS_PER_MINUTE = int(os.environ.get("OPENAI_CHAT_REQUESTS_PER_MINUTE", 3_500))
+CHAT_TOKENS_PER_MINUTE = int(os.environ.get("OPENAI_CHAT_TOKENS_PER_MINUTE", 160_000))
+EMBEDDING_REQUESTS_PER_MINUTE = int(
+    os.environ.get("OPENAI_EMBEDDING_REQUESTS_PER_MINUTE", 3_000)
+)
+EMBEDDING_TOKENS_PER_MINUTE = int(
+    os.environ.get("OPENAI_EMBEDDING_TOKENS_PER_MINUTE", 1_000_000)
+)
+
+# Number of retries of rate-limited or failed OpenAI requests
+MAX_RETRIES = 5
+
+# Base delay of the exponential backoff between retries, in seconds
+BACKOFF_FACTOR = 1.0
+
+# Longest delay between two retries, in seconds
+MAX_RETRY_DELAY_SECONDS = 60
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        """
+        Initialize a token-bucket rate limiter for requests and tokens per minute.
+
+        Both buckets refill continuously. A call that does not fit in the budget
+        reserves its share anyway and waits until the buckets have refilled, so
+        callers are served in arrival order.
+
+        Args:
+            requests_per_minute (int): Budget of requests per minute.
+            tokens_per_minute (int): Budget of tokens per minute.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.available_requests = float(requests_per_minute)
+        self.available_tokens = float(tokens_per_minute)
+        self.last_refill_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Reserve one request and a number of tokens from the budget.
+
+        Args:
+            tokens (int): Estimated number of tokens of the request.
+
+        Returns:
+            float: Time to wait before sending the request, in seconds.
+        """
+        tokens = min(tokens, self.tokens_per_minute)
+
+        with self.lock:
+            now = time.monotonic()
+            elapsed_minutes = (now - self.last_refill_time) / 60
+            self.last_refill_time = now
+
+            self.available_requests = min(
+                self.requests_per_minute,
+                self.available_requests + elapsed_minutes * self.requests_per_minute,
+            )
+            self.available_tokens = min(
+                self.tokens_per_minute,
+                self.available_tokens + elapsed_minutes * self.tokens_per_minute,
+            )
+
+            self.available_requests -= 1
+            self.available_tokens -= tokens
+
+            return 60 * max(
+                0.0,
+                -self.available_requests / self.requests_per_minute,
+                -self.available_tokens / self.tokens_per_minute,
+            )
+
+    def acquire(self, tokens: int) -> None:
+        """
+        Wait until a request of the given size fits in the budget.
+
+        Args:
+            tokens (int): Estimated number of tokens of the request.
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            logging.info(f"Rate limiter queued request for {delay:.2f}s")
+            time.sleep(delay)
+
+
+@lru_cache(maxsize=None)
+def get_chat_rate_limiter() -> RateLimiter:
+    """
+    Get the rate limiter shared by all chat completion requests in the process.
+
+    Returns:
+        RateLimiter: Chat rate limiter.
+    """
+    return RateLimiter(CHAT_REQUESTS_PER_MINUTE, CHAT_TOKENS_PER_MINUTE)
+
+
+@lru_cache(maxsize=None)
+def get_embedding_rate_limiter() -> RateLimiter:
+    """
+    Get the rate limiter shared by all embedding requests in the process.
+
+    Returns:
+        RateLimiter: Embedding rate limiter.
+    """
+    return RateLimiter(EMBEDDING_REQUESTS_PER_MINUTE, EMBEDDING_TOKENS_PER_MINUTE)
+
+
+@lru_cache(maxsize=None)
+def get_retryable_errors() -> Tuple[Type[Exception], ...]:
+    """
+    Get the OpenAI errors worth retrying: rate limiting, timeouts and transient server errors.
+
+    openai is imported on the first call, so that importing this module stays fast.
+
+    Returns:
+        Tuple[Type[Exception], ...]: Retryable error types.
+    """
+    import openai
+
+    return (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+
+
+def get_retry_delay(error: Exception, attempt: int) -> float:
+    """
+    Compute how long to wait before retrying a failed OpenAI request.
+
+    The Retry-After header of the response is honored when present, otherwise
+    the delay grows exponentially with the attempt number.
+
+    Args:
+        error (Exception): Error raised by the request.
+        attempt (int): Number of the failed attempt, starting from 0.
+
+    Returns:
+        float: Delay in seconds.
+    """
+    response = getattr(error, "response", None)
+    retry_after: Optional[str] = None
+
+    if response is not None:
+        retry_after_ms = response.headers.get("retry-after-ms")
+        if retry_after_ms is not None:
+            try:
+                return min(float(retry_after_ms) / 1000, MAX_RETRY_DELAY_SECONDS)
+            except ValueError:
+                pass
+        retry_after = response.headers.get("retry-after")
+
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), MAX_RETRY_DELAY_SECONDS)
+        except ValueError:
+            pass
+
+    return min(BACKOFF_FACTOR * 2**attempt, MAX_RETRY_DELAY_SECONDS)
+
+
+def call_with_rate_limit(
+    rate_limiter: RateLimiter, tokens: int, func: Callable[..., Any], *args
+) -> Any:
+    """
+    Call an OpenAI request function within the rate limits, retrying transient errors.
+
+    Every attempt, including retries, waits for its share of the budget first.
+
+    Args:
+        rate_limiter (RateLimiter): Rate limiter of the endpoint.
+        tokens (int): Estimated number of tokens of the request.
+        func (Callable[..., Any]): Function sending the request.
+        *args: Arguments of the function.
+
+    Returns:
+        Any: Result of the function.
+
+    Raises:
+        Exception: The last error if all retries failed.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        rate_limiter.acquire(tokens)
+        try:
+            return func(*args)
+        except get_retryable_errors() as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = get_retry_delay(e, attempt)
+            logging.warning(
+                f"OpenAI request failed ({type(e).__name__}), retrying in {delay:.2f}s"
+            )
+            time.sleep(delay)
@@ -1,9 +1,18 @@
+import csv
+import json
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional
 from src.scraping.web_scraper_processor import WebScraperProcessor
-from src.linkedin_user_processing import get_user_info
+from src.linkedin_user_processing import get_user_info, prefetch_user_info
+from src.pipeline import run_pipeline
 from src.utils import (
+    BATCH_RESULTS_PATH,
     LEAD_SUMMARY_AND_FACTS_FILENAME,
+    MAX_LEAD_WORKERS,
+    get_url_datapath,
     save_lead_summary_and_facts,
     read_lead_summary_and_facts,
     setup_logging,
@@ -11,10 +20,19 @@ from src.utils import (
 from src.generative_ai_utils import (
     get_personalized_message,
     get_lead_facts_and_summary,
+    create_or_get_vector_db,
 )
 
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+
 LOG_FILE_PATH = "logs/get_links_to_scrape.log"
 
+DEFAULT_STYLE = "Professional"
+
+# Fields every lead of a batch must have
+REQUIRED_LEAD_FIELDS = ("company_url", "user_id")
+
 
 def get_lead_facts(datapath: str, text: str) -> str:
     """
@@ -38,33 +56,28 @@ def get_lead_facts(datapath: str, text: str) -> str:
     return lead_facts_and_summary
 
 
-def process(company_url: str, user_id: str, style: str, additional_notes: str) -> str:
+def process_lead(
+    datapath: str,
+    user_id: str,
+    company_facts_and_summary: str,
+    style: str,
+    additional_notes: str,
+    db: Optional["FAISS"] = None,
+) -> str:
     """
-    Process company and user information to generate a personalized message.
+    Generate a personalized message for one lead of an already scraped company.
 
     Args:
-        company_url (str): URL of the company's website.
+        datapath (str): Path to the company's data directory.
         user_id (str): ID of the user (e.g., LinkedIn ID).
+        company_facts_and_summary (str): Company facts and summary.
         style (str): Style of the personalized message.
-        additional_notes (str)
+        additional_notes (str): Additional notes for the message.
+        db (Optional[FAISS]): Already loaded FAISS vector database of the company.
 
     Returns:
-        str: Personalized message generated based on input parameters.
+        str: Personalized message.
     """
-    # Set up logging
-    setup_logging(LOG_FILE_PATH)
-    logging.info(f"Company URL: {company_url}, User ID: {user_id}")
-
-    # Initialize web scraper processor with company URL
-    web_scraper_processor = WebScraperProcessor(company_url)
-    web_scraper_processor.run()
-
-    # Get data path from web scraper processor
-    datapath = web_scraper_processor.datapath
-
-    # Get company facts and summary from web scraper processor
-    company_facts_and_summary = web_scraper_processor.get_company_facts()
-
     # Get user information based on data path and user ID
     lead_info = get_user_info(datapath, user_id)
 
@@ -73,15 +86,287 @@ def process(company_url: str, user_id: str, style: str, additional_notes: str) -
 
     # Generate personalized message using data path, user ID, company facts and summary,
     # lead facts and summary, style and additional_notes
-    personalised_message = get_personalized_message(
+    return get_personalized_message(
         datapath,
         user_id,
         company_facts_and_summary,
         lead_facts_and_summary,
         style,
         additional_notes,
+        db,
+    )
+
+
+def process(
+    company_url: str,
+    user_id: str,
+    style: str,
+    additional_notes: str,
+    refresh: bool = False,
+) -> str:
+    """
+    Process company and user information to generate a personalized message.
+
+    The company branch (scrape, summary, index) and the lead branch (LinkedIn
+    profile, lead summary) do not depend on each other and run in parallel;
+    they only join for the final message.
+
+    Args:
+        company_url (str): URL of the company's website.
+        user_id (str): ID of the user (e.g., LinkedIn ID).
+        style (str): Style of the personalized message.
+        additional_notes (str)
+        refresh (bool): Whether to scrape the company website again. Unchanged pages
+            are revalidated, not downloaded, and the summary and index are updated
+            only if pages changed.
+
+    Returns:
+        str: Personalized message generated based on input parameters.
+    """
+    # Set up logging
+    setup_logging(LOG_FILE_PATH)
+    logging.info(f"Company URL: {company_url}, User ID: {user_id}")
+
+    # The data path only depends on the company URL, so the lead branch can use it right away
+    datapath = get_url_datapath(company_url, create=True)
+
+    def scrape_company() -> WebScraperProcessor:
+        web_scraper_processor = WebScraperProcessor(company_url, refresh=refresh)
+        web_scraper_processor.run()
+        return web_scraper_processor
+
+    def write_message(
+        company_facts_and_summary: str, lead_facts_and_summary: str, db: "FAISS"
+    ) -> str:
+        return get_personalized_message(
+            datapath,
+            user_id,
+            company_facts_and_summary,
+            lead_facts_and_summary,
+            style,
+            additional_notes,
+            db,
+        )
+
+    results = run_pipeline(
+        {
+            # Company branch
+            "scrape": (scrape_company, []),
+            "company_facts": (
+                lambda processor: processor.get_company_facts(),
+                ["scrape"],
+            ),
+            "vector_db": (lambda _: create_or_get_vector_db(datapath), ["scrape"]),
+            # Lead branch
+            "lead_info": (lambda: get_user_info(datapath, user_id), []),
+            "lead_facts": (
+                lambda lead_info: get_lead_facts_and_summary(
+                    datapath, lead_info, user_id
+                ),
+                ["lead_info"],
+            ),
+            # Join
+            "message": (
+                write_message,
+                ["company_facts", "lead_facts", "vector_db"],
+            ),
+        }
     )
+    personalised_message = results["message"]
 
     logging.info(f"Personalised message: {personalised_message}")
 
     return personalised_message
+
+
+def get_missing_lead_fields(lead: Dict[str, str]) -> List[str]:
+    """
+    Get the required fields a lead is missing or has empty.
+
+    Args:
+        lead (Dict[str, str]): Lead to check.
+
+    Returns:
+        List[str]: Missing fields, empty if the lead is valid.
+    """
+    return [
+        field
+        for field in REQUIRED_LEAD_FIELDS
+        if not str(lead.get(field) or "").strip()
+    ]
+
+
+def read_leads(path: str) -> List[Dict[str, str]]:
+    """
+    Read leads from a CSV or JSONL file.
+
+    Every lead has a company_url and a user_id, and optionally a style and
+    additional_notes. Rows missing a required field are logged but kept, and
+    JSONL lines that are not JSON objects are kept as empty leads, so that
+    process_batch records an error for each of them instead of stopping the batch.
+
+    Args:
+        path (str): Path to a .csv file with a header row or a .jsonl file.
+
+    Returns:
+        List[Dict[str, str]]: Leads in file order.
+    """
+    numbered_leads = []
+    with open(path, "r", newline="") as file:
+        if path.endswith(".jsonl"):
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    lead = json.loads(line)
+                except json.JSONDecodeError as e:
+                    logging.warning(f"Could not parse lead on line {line_number}: {e}")
+                    lead = None
+                numbered_leads.append(
+                    (line_number, lead if isinstance(lead, dict) else {})
+                )
+        else:
+            # Line 1 is the header row
+            numbered_leads = list(enumerate(csv.DictReader(file), start=2))
+
+    for line_number, lead in numbered_leads:
+        missing_fields = get_missing_lead_fields(lead)
+        if missing_fields:
+            logging.warning(
+                f"Lead on line {line_number} of {path} is missing: {', '.join(missing_fields)}"
+            )
+    leads = [lead for _, lead in numbered_leads]
+
+    logging.info(f"Read {len(leads)} leads from: {path}")
+
+    return leads
+
+
+def process_batch(
+    leads: List[Dict[str, str]],
+    output_path: str = BATCH_RESULTS_PATH,
+    style: str = DEFAULT_STYLE,
+    additional_notes: str = "",
+    max_workers: int = MAX_LEAD_WORKERS,
+    refresh: bool = False,
+) -> List[Dict[str, str]]:
+    """
+    Generate personalized messages for many leads, scraping and indexing each company once.
+
+    Leads are processed concurrently by a pool of max_workers threads; calls to
+    LinkedIn and OpenAI are further capped per service. LinkedIn profiles of all
+    leads are prefetched in the background from the start. Leads of a company start
+    as soon as the company is indexed, while the next company is being scraped.
+    Results are appended to a JSONL file as soon as each lead is processed, so
+    a crashed batch keeps the messages generated so far. Leads missing a
+    company_url or a user_id get an error result and are skipped.
+
+    Args:
+        leads (List[Dict[str, str]]): Leads with company_url, user_id and optional
+            style and additional_notes.
+        output_path (str): Path of the JSONL file to append results to.
+        style (str): Style used for leads without their own style.
+        additional_notes (str): Additional notes used for leads without their own notes.
+        max_workers (int): Maximum number of leads processed at the same time.
+        refresh (bool): Whether to scrape the company websites again, see process.
+
+    Returns:
+        List[Dict[str, str]]: Result of every lead, with a message or an error.
+    """
+    setup_logging(LOG_FILE_PATH)
+    logging.info(f"Processing batch of {len(leads)} leads, workers: {max_workers}")
+
+    # Group leads by company, keeping the order of first appearance
+    leads_by_company = {}
+    invalid_leads = []
+    for lead in leads:
+        missing_fields = get_missing_lead_fields(lead)
+        if missing_fields:
+            invalid_leads.append((lead, missing_fields))
+            continue
+        leads_by_company.setdefault(lead["company_url"], []).append(lead)
+
+    # LinkedIn profiles of all leads are fetched in the background while companies are scraped
+    prefetch_thread = threading.Thread(
+        target=prefetch_user_info,
+        args=(
+            [
+                (get_url_datapath(company_url, create=True), lead["user_id"])
+                for company_url, company_leads in leads_by_company.items()
+                for lead in company_leads
+            ],
+        ),
+        daemon=True,
+    )
+    prefetch_thread.start()
+
+    results = []
+    results_lock = threading.Lock()
+    output_folder = os.path.dirname(output_path)
+    if output_folder:
+        os.makedirs(output_folder, exist_ok=True)
+
+    with open(output_path, "a") as output_file, ThreadPoolExecutor(
+        max_workers=max_workers
+    ) as executor:
+
+        def save_result(result: Dict[str, str]) -> None:
+            with results_lock:
+                output_file.write(json.dumps(result) + "\n")
+                output_file.flush()
+                results.append(result)
+
+        def run_lead(result: Dict[str, str], *args) -> None:
+            try:
+                result["message"] = process_lead(*args)
+            except Exception as e:
+                logging.error(f"Error processing lead {result['user_id']}: {e}")
+                result["error"] = str(e)
+            save_result(result)
+
+        for lead, missing_fields in invalid_leads:
+            save_result(
+                {
+                    "company_url": lead.get("company_url"),
+                    "user_id": lead.get("user_id"),
+                    "error": f"Missing lead fields: {', '.join(missing_fields)}",
+                }
+            )
+
+        for company_url, company_leads in leads_by_company.items():
+            try:
+                web_scraper_processor = WebScraperProcessor(
+                    company_url, refresh=refresh
+                )
+                web_scraper_processor.run()
+                datapath = web_scraper_processor.datapath
+                company_facts_and_summary = web_scraper_processor.get_company_facts()
+                db = create_or_get_vector_db(datapath)
+            except Exception as e:
+                logging.error(f"Error processing company {company_url}: {e}")
+                for lead in company_leads:
+                    save_result(
+                        {
+                            "company_url": company_url,
+                            "user_id": lead["user_id"],
+                            "error": str(e),
+                        }
+                    )
+                continue
+
+            for lead in company_leads:
+                executor.submit(
+                    run_lead,
+                    {"company_url": company_url, "user_id": lead["user_id"]},
+                    datapath,
+                    lead["user_id"],
+                    company_facts_and_summary,
+                    lead.get("style") or style,
+                    lead.get("additional_notes") or additional_notes,
+                    db,
+                )
+
+    prefetch_thread.join()
+    logging.info(f"Processed batch, results saved to: {output_path}")
+
+    return results
@@ -0,0 +1,462 @@
+import asyncio
+import logging
+import os
+from typing import Callable, Counter, Dict, List, Optional, Set, Tuple
+
+import aiohttp
+
+from src.scraping.http_cache import HttpCache
+from src.scraping.http_client import (
+    async_fetch,
+    async_get_html,
+    create_async_session,
+    GONE_STATUS_CODES,
+    MAX_CONNECTIONS_PER_HOST,
+)
+from src.scraping.link_ranking import rank_links
+
+# Maximum number of pages fetched at the same time
+MAX_CONCURRENT_REQUESTS = 20
+
+# Crawl budget of one domain, overridable through environment variables
+MAX_PAGES_PER_DOMAIN = int(os.environ.get("SCRAPER_MAX_PAGES_PER_DOMAIN", 100))
+MAX_BYTES_PER_DOMAIN = int(
+    os.environ.get("SCRAPER_MAX_BYTES_PER_DOMAIN", 20 * 1024 * 1024)
+)
+
+# Links, text and rel=canonical URL (None if absent) of a page
+ParsedPage = Tuple[Set[str], str, Optional[str]]
+
+
+class CrawlBudget:
+    def __init__(
+        self,
+        max_pages: int = MAX_PAGES_PER_DOMAIN,
+        max_bytes: int = MAX_BYTES_PER_DOMAIN,
+    ):
+        """
+        Initialize the budget of one crawl, in pages and in downloaded bytes.
+
+        Pages are counted when they are scheduled, bytes once they are downloaded.
+        Pages of one level are fetched concurrently, so the byte budget can be
+        exceeded by the pages in flight when it runs out.
+
+        Args:
+            max_pages (int): Maximum number of pages fetched.
+            max_bytes (int): Maximum number of body bytes downloaded.
+        """
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.n_pages = 0
+        self.n_bytes = 0
+
+    @property
+    def bytes_exhausted(self) -> bool:
+        """
+        Whether the byte budget is spent.
+        """
+        return self.n_bytes >= self.max_bytes
+
+    def select(self, links: List[str]) -> List[str]:
+        """
+        Schedule as many links as the page budget allows, in the given order.
+
+        Args:
+            links (List[str]): Links to visit, most important first.
+
+        Returns:
+            List[str]: Links to fetch.
+        """
+        n_left = 0 if self.bytes_exhausted else self.max_pages - self.n_pages
+        selected_links = links[: max(n_left, 0)]
+        self.n_pages += len(selected_links)
+
+        if len(selected_links) < len(links):
+            logging.info(
+                f"Crawl budget reached, skipping {len(links) - len(selected_links)} links"
+            )
+
+        return selected_links
+
+    def spend(self, n_bytes: int) -> None:
+        """
+        Count downloaded bytes.
+
+        Args:
+            n_bytes (int): Number of body bytes downloaded.
+        """
+        self.n_bytes += n_bytes
+
+
+async def fetch_html(
+    session: aiohttp.ClientSession, semaphore: asyncio.Semaphore, url: str
+) -> Optional[str]:
+    """
+    Fetch the HTML of one page.
+
+    Args:
+        session (aiohttp.ClientSession): Shared HTTP session.
+        semaphore (asyncio.Semaphore): Semaphore bounding the number of requests in flight.
+        url (str): URL of the page.
+
+    Returns:
+        Optional[str]: HTML of the page, or None if the request failed.
+    """
+    async with semaphore:
+        return await async_get_html(session, url)
+
+
+async def async_crawl_links(
+    url: str,
+    depth: int,
+    extract_links: Callable[[str, str], Set[str]],
+    max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+    max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+    seed_links: Optional[List[str]] = None,
+    budget: Optional[CrawlBudget] = None,
+    inlink_counts: Optional[Counter[str]] = None,
+) -> List[str]:
+    """
+    Crawl links breadth-first from the root URL, fetching each level concurrently.
+
+    Links of each new level are visited from the most to the least useful according
+    to link_ranking, so the page budget cuts the least useful ones. Links that
+    turn out not to be pages, either gone or of another content type, are left out.
+
+    Args:
+        url (str): The root URL.
+        depth (int): The depth to crawl.
+        extract_links (Callable[[str, str], Set[str]]): Function returning the links
+            found in a page, given its HTML and URL.
+        max_concurrency (int): Maximum number of requests in flight.
+        max_connections_per_host (int): Maximum number of open connections to one host.
+        seed_links (Optional[List[str]]): Links crawled with the root URL, e.g. from
+            the sitemap, most important first.
+        budget (Optional[CrawlBudget]): Budget of the crawl, the default one if None.
+        inlink_counts (Optional[Counter[str]]): Counter updated with the number of
+            crawled pages linking to each link.
+
+    Returns:
+        List[str]: A list of all links found, up to the page budget.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    budget = budget or CrawlBudget()
+    inlink_counts = Counter() if inlink_counts is None else inlink_counts
+
+    async def visit(session: aiohttp.ClientSession, link: str) -> Optional[Set[str]]:
+        if budget.bytes_exhausted:
+            return set()
+
+        async with semaphore:
+            result = await async_fetch(session, link)
+
+        if result is None:
+            return set()
+        if result.status in GONE_STATUS_CODES or result.skipped:
+            return None
+        budget.spend(result.size)
+        return extract_links(result.text, link)
+
+    visited_links = set()
+    not_page_links = set()
+    links_to_visit = budget.select(
+        [url] + [link for link in seed_links or [] if link != url]
+    )
+
+    async with create_async_session(max_connections_per_host) as session:
+        # Traverse the links up to the specified depth, one level at a time
+        for level in range(depth):
+            found_links = await asyncio.gather(
+                *(visit(session, link) for link in links_to_visit)
+            )
+            visited_links.update(links_to_visit)
+            not_page_links.update(
+                link
+                for link, links in zip(links_to_visit, found_links)
+                if links is None
+            )
+            found_links = [links for links in found_links if links is not None]
+            for links in found_links:
+                inlink_counts.update(links)
+            links_to_visit = budget.select(
+                rank_links(
+                    sorted(set().union(*found_links) - visited_links), inlink_counts
+                )
+            )
+            logging.info(
+                f"Crawled level {level}, new links to visit: {len(links_to_visit)}"
+            )
+
+    visited_links.update(links_to_visit)
+    visited_links -= not_page_links
+    logging.info(
+        f"Crawled {len(visited_links)} links, downloaded bytes: {budget.n_bytes}"
+    )
+
+    return list(visited_links)
+
+
+def crawl_links(
+    url: str,
+    depth: int,
+    extract_links: Callable[[str, str], Set[str]],
+    max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+    max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+    seed_links: Optional[List[str]] = None,
+    budget: Optional[CrawlBudget] = None,
+    inlink_counts: Optional[Counter[str]] = None,
+) -> List[str]:
+    """
+    Blocking wrapper around async_crawl_links.
+
+    Args:
+        url (str): The root URL.
+        depth (int): The depth to crawl.
+        extract_links (Callable[[str, str], Set[str]]): Function returning the links
+            found in a page, given its HTML and URL.
+        max_concurrency (int): Maximum number of requests in flight.
+        max_connections_per_host (int): Maximum number of open connections to one host.
+        seed_links (Optional[List[str]]): Links crawled with the root URL.
+        budget (Optional[CrawlBudget]): Budget of the crawl, the default one if None.
+        inlink_counts (Optional[Counter[str]]): Counter updated with the number of
+            crawled pages linking to each link.
+
+    Returns:
+        List[str]: A list of all links found.
+    """
+    return asyncio.run(
+        async_crawl_links(
+            url,
+            depth,
+            extract_links,
+            max_concurrency,
+            max_connections_per_host,
+            seed_links,
+            budget,
+            inlink_counts,
+        )
+    )
+
+
+async def async_crawl_pages(
+    url: str,
+    depth: int,
+    parse_page: Callable[[str, str], ParsedPage],
+    max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+    max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+    http_cache: Optional[HttpCache] = None,
+    seed_links: Optional[List[str]] = None,
+    budget: Optional[CrawlBudget] = None,
+    inlink_counts: Optional[Counter[str]] = None,
+) -> Dict[str, Optional[str]]:
+    """
+    Crawl pages breadth-first from the root URL, fetching and parsing each page once.
+
+    Every page up to the specified depth is parsed for both its links and its text.
+    Pages of the last level are fetched for their text only. Pages are keyed by
+    the canonical URL they declare, so a page reached through several URLs is
+    kept and followed once. With an HTTP cache, cached pages are requested
+    conditionally and reused as is when not modified. Links of each new level
+    are visited from the most to the least useful according to link_ranking.
+    Pages that no longer exist and responses of another content type are left
+    out. Pages that could not be fetched are reused from the cache
+    if possible, otherwise they are kept with None text, so that their previous
+    record is not overwritten by a transient failure. The crawl stops when the
+    page or byte budget is spent, pages not fetched because of it are left out.
+
+    Args:
+        url (str): The root URL.
+        depth (int): The depth to crawl.
+        parse_page (Callable[[str, str], ParsedPage]): Function returning the links,
+            the text and the canonical URL of a page, given its HTML and URL.
+        max_concurrency (int): Maximum number of requests in flight.
+        max_connections_per_host (int): Maximum number of open connections to one host.
+        http_cache (Optional[HttpCache]): Cache of page validators and parsed content.
+        seed_links (Optional[List[str]]): Links crawled with the root URL, e.g. from
+            the sitemap, most important first.
+        budget (Optional[CrawlBudget]): Budget of the crawl, the default one if None.
+        inlink_counts (Optional[Counter[str]]): Counter updated with the number of
+            crawled pages linking to each link.
+
+    Returns:
+        Dict[str, Optional[str]]: Text of every page found, keyed by URL in crawl
+            order. Pages that could not be fetched have None text.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    budget = budget or CrawlBudget()
+    inlink_counts = Counter() if inlink_counts is None else inlink_counts
+    failed_links = set()
+
+    async def visit(session: aiohttp.ClientSession, link: str) -> Optional[ParsedPage]:
+        if budget.bytes_exhausted:
+            return None
+
+        headers = http_cache.get_conditional_headers(link) if http_cache else {}
+
+        async with semaphore:
+            result = await async_fetch(session, link, headers)
+
+        if result is None:
+            cached_page = http_cache.get(link) if http_cache is not None else None
+            if cached_page is None:
+                failed_links.add(link)
+            else:
+                logging.info(f"Reusing the cached content of {link}")
+            return cached_page
+        if result.status in GONE_STATUS_CODES or result.skipped:
+            return None
+        budget.spend(result.size)
+
+        if result.status == 304 and headers:
+            return http_cache.get(link)
+
+        links, text, canonical = parse_page(result.text, link)
+        if http_cache is not None:
+            http_cache.update(
+                link, result.etag, result.last_modified, links, text, canonical
+            )
+
+        return links, text, canonical
+
+    page_texts = {}
+    visited_links = set()
+    links_to_visit = budget.select(
+        [url] + [link for link in seed_links or [] if link != url]
+    )
+
+    async with create_async_session(max_connections_per_host) as session:
+        for level in range(depth + 1):
+            parsed_pages = await asyncio.gather(
+                *(visit(session, link) for link in links_to_visit)
+            )
+            new_links = set()
+            for link, parsed_page in zip(links_to_visit, parsed_pages):
+                visited_links.add(link)
+                if parsed_page is None:
+                    if link in failed_links:
+                        page_texts.setdefault(link, None)
+                    # Otherwise gone, not HTML, or over the byte budget
+                    continue
+                links, text, canonical = parsed_page
+                # Sites declaring the home page as canonical for every page are
+                # misconfigured, such canonicals are ignored
+                if canonical == url and link != url:
+                    canonical = None
+                page_url = canonical or link
+                if page_url in page_texts:
+                    # Same page as one already crawled under its canonical URL
+                    continue
+                page_texts[page_url] = text
+                new_links.update(links)
+                inlink_counts.update(links)
+
+            if level == depth:
+                break
+
+            links_to_visit = budget.select(
+                rank_links(
+                    sorted(new_links - page_texts.keys() - visited_links), inlink_counts
+                )
+            )
+            logging.info(
+                f"Crawled level {level}, new links to visit: {len(links_to_visit)}"
+            )
+            if not links_to_visit:
+                break
+
+    logging.info(f"Crawled {len(page_texts)} pages, downloaded bytes: {budget.n_bytes}")
+
+    return page_texts
+
+
+def crawl_pages(
+    url: str,
+    depth: int,
+    parse_page: Callable[[str, str], ParsedPage],
+    max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+    max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+    http_cache: Optional[HttpCache] = None,
+    seed_links: Optional[List[str]] = None,
+    budget: Optional[CrawlBudget] = None,
+    inlink_counts: Optional[Counter[str]] = None,
+) -> Dict[str, Optional[str]]:
+    """
+    Blocking wrapper around async_crawl_pages.
+
+    Args:
+        url (str): The root URL.
+        depth (int): The depth to crawl.
+        parse_page (Callable[[str, str], ParsedPage]): Function returning the links,
+            the text and the canonical URL of a page, given its HTML and URL.
+        max_concurrency (int): Maximum number of requests in flight.
+        max_connections_per_host (int): Maximum number of open connections to one host.
+        http_cache (Optional[HttpCache]): Cache of page validators and parsed content.
+        seed_links (Optional[List[str]]): Links crawled with the root URL.
+        budget (Optional[CrawlBudget]): Budget of the crawl, the default one if None.
+        inlink_counts (Optional[Counter[str]]): Counter updated with the number of
+            crawled pages linking to each link.
+
+    Returns:
+        Dict[str, Optional[str]]: Text of every page found, keyed by URL in crawl
+            order. Pages that could not be fetched have None text.
+    """
+    return asyncio.run(
+        async_crawl_pages(
+            url,
+            depth,
+            parse_page,
+            max_concurrency,
+            max_connections_per_host,
+            http_cache,
+            seed_links,
+            budget,
+            inlink_counts,
+        )
+    )
+
+
+async def async_fetch_pages(
+    urls: List[str],
+    max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+    max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+) -> List[Optional[str]]:
+    """
+    Fetch the HTML of many pages concurrently.
+
+    Args:
+        urls (List[str]): URLs of the pages.
+        max_concurrency (int): Maximum number of requests in flight.
+        max_connections_per_host (int): Maximum number of open connections to one host.
+
+    Returns:
+        List[Optional[str]]: HTML of each page in the order of urls, None for failed
+            requests and pages that no longer exist.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async with create_async_session(max_connections_per_host) as session:
+        return await asyncio.gather(
+            *(fetch_html(session, semaphore, url) for url in urls)
+        )
+
+
+def fetch_pages(
+    urls: List[str],
+    max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+    max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+) -> List[Optional[str]]:
+    """
+    Blocking wrapper around async_fetch_pages.
+
+    Args:
+        urls (List[str]): URLs of the pages.
+        max_concurrency (int): Maximum number of requests in flight.
+        max_connections_per_host (int): Maximum number of open connections to one host.
+
+    Returns:
+        List[Optional[str]]: HTML of each page in the order of urls, None for failed
+            requests and pages that no longer exist.
+    """
+    return asyncio.run(
+        async_fetch_pages(urls, max_concurrency, max_connections_per_host)
+    )
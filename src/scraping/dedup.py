@@ -0,0 +1,68 @@
+import logging
+from typing import Dict
+
+# Blocks shorter than this are kept even if repeated, they carry too little to matter
+# and are often meaningful next to their neighbours (e.g. "Yes", "Price")
+MIN_BLOCK_LENGTH = 20
+
+
+def normalize_block(block: str) -> str:
+    """
+    Normalize a block of text so that blocks differing only in case or spacing match.
+
+    Args:
+        block (str): Block of text.
+
+    Returns:
+        str: Normalized block.
+    """
+    return " ".join(block.split()).lower()
+
+
+def remove_repeated_blocks(
+    page_texts: Dict[str, str], min_block_length: int = MIN_BLOCK_LENGTH
+) -> Dict[str, str]:
+    """
+    Remove blocks of text repeated across pages, keeping their first occurrence.
+
+    A block is a line of page text. Headers, footers, cookie notices and other
+    boilerplate repeated on every page of a site are kept once, on the first
+    page they appear on, so they are chunked, embedded and summarized once.
+    Repeats inside a single page are kept.
+
+    Args:
+        page_texts (Dict[str, str]): Text of each page, in page order.
+        min_block_length (int): Blocks shorter than this are never removed.
+
+    Returns:
+        Dict[str, str]: Text of each page without blocks seen on earlier pages.
+    """
+    seen_blocks = set()
+    deduplicated_texts = {}
+    n_removed = 0
+    n_characters = 0
+
+    for url, text in page_texts.items():
+        page_blocks = set()
+        kept_lines = []
+
+        for line in text.splitlines():
+            block = normalize_block(line)
+            if len(block) >= min_block_length:
+                if block in seen_blocks:
+                    n_removed += 1
+                    continue
+                page_blocks.add(block)
+            kept_lines.append(line)
+
+        seen_blocks |= page_blocks
+        deduplicated_texts[url] = "\n".join(kept_lines)
+        n_characters += len(text)
+
+    n_deduplicated_characters = sum(len(text) for text in deduplicated_texts.values())
+    logging.info(
+        f"Removed {n_removed} repeated blocks from {len(page_texts)} pages, "
+        f"characters: {n_characters} -> {n_deduplicated_characters}"
+    )
+
+    return deduplicated_texts
@@ -1,29 +1,35 @@
 import json
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 import os
 import argparse
 import logging
-import requests
-from bs4 import BeautifulSoup
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
 from dotenv import load_dotenv, find_dotenv
 from src.generative_ai_utils import clean_llm_output
+from src.llm_cache import invoke_with_cache
+from src.llm_clients import get_chat_model
+from src.scraping.dedup import remove_repeated_blocks
+from src.scraping.async_crawler import fetch_pages, MAX_CONCURRENT_REQUESTS
+from src.scraping.html_parsing import parse_html
+from src.scraping.http_client import get_html
+from src.scraping.link_ranking import rank_links
 from src.utils import setup_logging, read_links, save_links
-import openai
 
 # Load environment variables
 _ = load_dotenv(find_dotenv())
 
-# OpenAI API key
-openai.api_key = os.environ["OPENAI_API_KEY"]
-
 # Path for logging
 LOG_FILE_PATH = "../../logs/extract_all_links_and_summary_text.log"
 
 # Language model for summarization
 LLM_MODEL = "gpt-3.5-turbo"
 
+# Number of best ranked links sent to the LLM to choose the summary links from
+N_CANDIDATE_LINKS = 50
+
+# Whether the LLM chooses summary links among the best ranked ones, instead of
+# taking the best ranked links as is
+SELECT_LINKS_WITH_LLM = os.environ.get("SCRAPER_SELECT_LINKS_WITH_LLM", "1") != "0"
+
 # Prompt for system to select best links for summary
 SUMMARY_SYSTEM_PROMPT = """
 I'm scraping this website to learn about the product offerings, benefits, and competitive advantages of this company or its products.
@@ -49,31 +55,67 @@ def parse_arguments() -> argparse.Namespace:
         default="../data/www_therocketbrew_com/all_links_depth_2.json",
         help="Path to read JSON file containing links",
     )
+    parser.add_argument(
+        "--no_llm",
+        action="store_true",
+        help="Select the summary links by their ranking only, without the LLM",
+    )
 
     return parser.parse_args()
 
 
-def find_best_links_for_summary(all_links: List[str], n_links: int = 10) -> List[str]:
+def find_best_links_for_summary(
+    all_links: List[str],
+    n_links: int = 10,
+    inlink_counts: Optional[Dict[str, int]] = None,
+    use_llm: bool = SELECT_LINKS_WITH_LLM,
+    n_candidates: int = N_CANDIDATE_LINKS,
+) -> List[str]:
     """
-    Use OpenAI's ChatOpenAI with a specific prompt to select the best links for summarization.
+    Select the best links for summarization.
+
+    Links are first ranked locally from their URL path keywords, depth and
+    in-link counts. Only the best ranked candidates are sent to OpenAI's ChatOpenAI,
+    so the prompt stays small whatever the size of the site.
 
     Args:
         all_links (List[str]): List of all links to consider.
         n_links (int): Number of links to select for summarization.
+        inlink_counts (Optional[Dict[str, int]]): Number of crawled pages linking
+            to each link, if known.
+        use_llm (bool): Whether the LLM chooses among the candidates. If False,
+            the n_links best ranked links are returned.
+        n_candidates (int): Number of best ranked links sent to the LLM.
 
     Returns:
         List[str]: List of selected links.
     """
-    chat = ChatOpenAI(temperature=0, model=LLM_MODEL)
+    ranked_links = rank_links(all_links, inlink_counts)
+
+    if not use_llm or len(ranked_links) <= n_links:
+        # No LLM call when asked not to, or when every link fits in the selection
+        summary_links = ranked_links[:n_links]
+        logging.info(f"Selected summary links by ranking: {summary_links}")
+        return summary_links
+
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    candidate_links = ranked_links[:n_candidates]
+    logging.info(
+        f"Sending {len(candidate_links)} of {len(all_links)} links to select summary links"
+    )
+
+    chat = get_chat_model(LLM_MODEL, 0)
 
-    result = chat.invoke(
+    content = invoke_with_cache(
+        chat,
         [
             SystemMessage(content=SUMMARY_SYSTEM_PROMPT),
-            HumanMessage(content=json.dumps(all_links)),
-        ]
+            HumanMessage(content=json.dumps(candidate_links)),
+        ],
     )
 
-    clean_output = clean_llm_output(result.content)
+    clean_output = clean_llm_output(content)
 
     llm_links = json.loads(clean_output)
     summary_links = llm_links["useful_links"]
@@ -93,42 +135,105 @@ def fetch_html_content_one_url(url: str) -> str:
     Returns:
         str: Raw HTML content of the page.
     """
-    try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an HTTPError for bad status codes
+    html = get_html(url)
+    if html is None:
+        return ""
 
-        # Parse HTML content
-        soup = BeautifulSoup(response.text, "html.parser")
+    return extract_text_from_html(html)
 
-        return soup.get_text()
-    except requests.RequestException as e:
-        logging.error(f"Error fetching URL {url}: {e}")
-        return ""
+
+def extract_text_from_html(html: str) -> str:
+    """
+    Extract the text of an HTML page, without scripts, styles, navigation and footers.
+
+    Args:
+        html (str): HTML content of the page.
+
+    Returns:
+        str: Text content of the page.
+    """
+    return parse_html(html).text
+
+
+def fetch_page_texts(
+    all_links: List[str], max_concurrency: int = MAX_CONCURRENT_REQUESTS
+) -> Dict[str, Optional[str]]:
+    """
+    Fetch HTML content for all links concurrently and extract the text of each page.
+
+    Args:
+        all_links (List[str]): List of all links to scrape.
+        max_concurrency (int): Maximum number of pages fetched at the same time.
+
+    Returns:
+        Dict[str, Optional[str]]: Text of each page keyed by link, in the order
+            of all_links. Pages that could not be fetched have None text.
+    """
+    html_pages = fetch_pages(all_links, max_concurrency=max_concurrency)
+
+    return {
+        link: extract_text_from_html(html) if html is not None else None
+        for link, html in zip(all_links, html_pages)
+    }
 
 
 def fetch_html_website_and_summary_content(
-    all_links: List[str], summary_links: List[str]
+    all_links: List[str],
+    summary_links: List[str],
+    max_concurrency: int = MAX_CONCURRENT_REQUESTS,
 ) -> Tuple[str, str]:
     """
     Fetch HTML content for all links and extract website and summary information.
 
+    Pages are downloaded concurrently; the output keeps the order of all_links.
+
     Args:
         all_links (List[str]): List of all links to scrape.
         summary_links (List[str]): List of selected links for summarization.
+        max_concurrency (int): Maximum number of pages fetched at the same time.
 
     Returns:
         Tuple[str, str]: Tuple containing website information and summary information.
     """
-    website_info = ""
-    summary_info = ""
+    page_texts = fetch_page_texts(all_links, max_concurrency)
 
-    for link in all_links:
-        html_content = fetch_html_content_one_url(link)
-        html_content += " \n "
-        website_info += html_content
+    return build_website_and_summary_info(all_links, page_texts, summary_links)
+
+
+def build_website_and_summary_info(
+    all_links: List[str],
+    page_texts: Dict[str, Optional[str]],
+    summary_links: List[str],
+) -> Tuple[str, str]:
+    """
+    Concatenate page texts into website and summary information.
+
+    Blocks repeated across pages are kept once in each, on the first page
+    they appear on.
+
+    Args:
+        all_links (List[str]): List of all links, in output order.
+        page_texts (Dict[str, Optional[str]]): Text of each page, keyed by link,
+            None for pages that could not be fetched.
+        summary_links (List[str]): List of selected links for summarization.
+
+    Returns:
+        Tuple[str, str]: Tuple containing website information and summary information.
+    """
+    summary_links = set(summary_links)
+    website_texts = remove_repeated_blocks(
+        {link: page_texts.get(link) or "" for link in all_links}
+    )
+    summary_texts = remove_repeated_blocks(
+        {
+            link: page_texts.get(link) or ""
+            for link in all_links
+            if link in summary_links
+        }
+    )
 
-        if link in summary_links:
-            summary_info += html_content
+    website_info = "".join(text + " \n " for text in website_texts.values())
+    summary_info = "".join(text + " \n " for text in summary_texts.values())
 
     logging.info(
         f"Scraped website info length: {len(website_info)}, summary length: {len(summary_info)}"
@@ -147,7 +252,9 @@ def main():
     all_links = read_links(args.path_to_read)
 
     N_MAX_SUMMARY_LINKS = 10
-    summary_links = find_best_links_for_summary(all_links)[:N_MAX_SUMMARY_LINKS]
+    summary_links = find_best_links_for_summary(all_links, use_llm=not args.no_llm)[
+        :N_MAX_SUMMARY_LINKS
+    ]
     logging.info(f"Selected summary links: {summary_links}")
 
     summary_links_data = {"summary_links": summary_links}
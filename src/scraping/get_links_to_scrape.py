@@ -1,10 +1,26 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-from typing import List, Set
+from urllib.parse import urljoin, urlparse, urlunparse
+from typing import Counter, Dict, List, Optional, Set, Tuple
 import os
 import argparse
 import logging
+from src.scraping.async_crawler import (
+    crawl_links,
+    crawl_pages,
+    CrawlBudget,
+    MAX_BYTES_PER_DOMAIN,
+    MAX_CONCURRENT_REQUESTS,
+    MAX_CONNECTIONS_PER_HOST,
+    MAX_PAGES_PER_DOMAIN,
+)
+from src.scraping.html_parsing import parse_html
+from src.scraping.http_cache import HttpCache
+from src.scraping.http_client import get_html
+from src.scraping.sitemap import get_sitemap_links
+from src.scraping.url_normalization import (
+    canonicalize_url,
+    get_site_host,
+    has_non_html_extension,
+)
 from src.utils import setup_logging, get_domain_data_folder, save_links
 
 LOG_FILE_PATH = "../../logs/get_links_to_scrape.log"
@@ -29,6 +45,29 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         "--depth", type=int, default=2, help="The depth to go to find links to scrape"
     )
+    parser.add_argument(
+        "--max_concurrency",
+        type=int,
+        default=MAX_CONCURRENT_REQUESTS,
+        help="Maximum number of pages fetched at the same time",
+    )
+    parser.add_argument(
+        "--max_pages",
+        type=int,
+        default=MAX_PAGES_PER_DOMAIN,
+        help="Maximum number of pages fetched from the domain",
+    )
+    parser.add_argument(
+        "--max_bytes",
+        type=int,
+        default=MAX_BYTES_PER_DOMAIN,
+        help="Maximum number of bytes downloaded from the domain",
+    )
+    parser.add_argument(
+        "--no_sitemap",
+        action="store_true",
+        help="Do not seed the crawl with the links of the sitemap",
+    )
     parser.add_argument(
         "--path_to_save",
         type=str,
@@ -49,65 +88,200 @@ def process_one_link(url: str) -> Set[str]:
     Returns:
         Set[str]: A set of extracted links from the URL.
     """
-    try:
-        # Fetch the HTML content of the URL
-        response = requests.get(url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Extract and clean links
-        links = {urljoin(url, a_tag["href"]) for a_tag in soup.find_all("a", href=True)}
-        clean_links = get_clean_links(links)
-        return filter_same_domain_links(clean_links, url)
-    except requests.RequestException as e:
-        logging.error(f"Error fetching the URL {url}: {e}")
+    # Fetch the HTML content of the URL
+    html = get_html(url)
+    if html is None:
         return set()
+    return extract_links_from_html(html, url)
+
+
+def extract_links_from_html(html: str, url: str) -> Set[str]:
+    """
+    Extract same-domain links from the HTML of a page.
+
+    Args:
+        html (str): HTML content of the page.
+        url (str): URL of the page, used to resolve relative links.
+
+    Returns:
+        Set[str]: A set of extracted links from the page.
+    """
+    return extract_links_from_hrefs(parse_html(html).hrefs, url)
+
+
+def extract_links_from_hrefs(hrefs: List[str], url: str) -> Set[str]:
+    """
+    Extract same-domain links from the href values of a page.
+
+    Args:
+        hrefs (List[str]): Href values of the links of the page.
+        url (str): URL of the page, used to resolve relative links.
+
+    Returns:
+        Set[str]: A set of extracted links from the page.
+    """
+    # Extract and clean links
+    links = {urljoin(url, href) for href in hrefs}
+    clean_links = get_clean_links(links)
+    return filter_same_domain_links(clean_links, url)
+
+
+def extract_links_and_text_from_html(
+    html: str, url: str
+) -> Tuple[Set[str], str, Optional[str]]:
+    """
+    Parse a page once and extract its same-domain links, its text and its canonical URL.
+
+    Args:
+        html (str): HTML content of the page.
+        url (str): URL of the page, used to resolve relative links.
+
+    Returns:
+        Tuple[Set[str], str, Optional[str]]: Extracted links, text content of the page
+            and its rel=canonical URL, None if it has none on the same domain.
+    """
+    parsed_html = parse_html(html)
+
+    canonical = None
+    if parsed_html.canonical:
+        canonical_links = extract_links_from_hrefs([parsed_html.canonical], url)
+        canonical = next(iter(canonical_links), None)
+
+    return extract_links_from_hrefs(parsed_html.hrefs, url), parsed_html.text, canonical
 
 
-def get_all_links(url: str, depth: int = 1) -> List[str]:
+def get_seed_links(url: str) -> List[str]:
+    """
+    Get the same-domain page links listed in the sitemaps of a site.
+
+    Args:
+        url (str): The root URL.
+
+    Returns:
+        List[str]: Links sorted by path depth, so top-level pages are crawled first.
+    """
+    links = filter_same_domain_links(get_clean_links(set(get_sitemap_links(url))), url)
+    return sorted(links, key=lambda link: (urlparse(link).path.count("/"), link))
+
+
+def get_all_links(
+    url: str,
+    depth: int = 1,
+    max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+    max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+    max_pages: int = MAX_PAGES_PER_DOMAIN,
+    max_bytes: int = MAX_BYTES_PER_DOMAIN,
+    use_sitemap: bool = True,
+    inlink_counts: Optional[Counter[str]] = None,
+) -> List[str]:
     """
     Recursively get all links from the root URL up to a specified depth.
 
+    Pages of the same level are fetched concurrently over a shared session.
+
     Args:
         url (str): The root URL.
         depth (int): The depth to crawl.
+        max_concurrency (int): Maximum number of pages fetched at the same time.
+        max_connections_per_host (int): Maximum number of open connections to one host.
+        max_pages (int): Maximum number of pages fetched and links returned.
+        max_bytes (int): Maximum number of bytes downloaded.
+        use_sitemap (bool): Whether to crawl the sitemap links together with the root URL.
+        inlink_counts (Optional[Counter[str]]): Counter updated with the number of
+            crawled pages linking to each link.
 
     Returns:
         List[str]: A list of all links found.
     """
-    visited_links = set()
-    links_to_visit = {url}
-
-    # Traverse the links up to the specified depth
-    for _ in range(depth):
-        new_links = set()
-        for link in links_to_visit:
-            new_links.update(process_one_link(link))
-        visited_links.update(links_to_visit)
-        links_to_visit = new_links - visited_links
-
-    visited_links.update(links_to_visit)
+    url = canonicalize_url(url) or url
+    visited_links = crawl_links(
+        url,
+        depth,
+        extract_links_from_html,
+        max_concurrency=max_concurrency,
+        max_connections_per_host=max_connections_per_host,
+        seed_links=get_seed_links(url) if use_sitemap else None,
+        budget=CrawlBudget(max_pages, max_bytes),
+        inlink_counts=inlink_counts,
+    )
 
     logging.info(f"Extracted all links, count: {len(list(visited_links))}")
 
     return list(visited_links)
 
 
+def get_all_pages(
+    url: str,
+    depth: int = 1,
+    max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+    max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+    http_cache: Optional[HttpCache] = None,
+    max_pages: int = MAX_PAGES_PER_DOMAIN,
+    max_bytes: int = MAX_BYTES_PER_DOMAIN,
+    use_sitemap: bool = True,
+    inlink_counts: Optional[Counter[str]] = None,
+) -> Dict[str, Optional[str]]:
+    """
+    Get all links from the root URL up to a specified depth together with their text.
+
+    Each page is downloaded and parsed only once. With an HTTP cache, pages that
+    have not changed since the previous crawl are neither downloaded nor parsed.
+    Pages listed in the sitemap are crawled first, then links are followed
+    until the depth, page or byte budget is reached.
+
+    Args:
+        url (str): The root URL.
+        depth (int): The depth to crawl.
+        max_concurrency (int): Maximum number of pages fetched at the same time.
+        max_connections_per_host (int): Maximum number of open connections to one host.
+        http_cache (Optional[HttpCache]): Cache of page validators and parsed content.
+        max_pages (int): Maximum number of pages fetched.
+        max_bytes (int): Maximum number of bytes downloaded.
+        use_sitemap (bool): Whether to crawl the sitemap links together with the root URL.
+        inlink_counts (Optional[Counter[str]]): Counter updated with the number of
+            crawled pages linking to each link.
+
+    Returns:
+        Dict[str, Optional[str]]: Text of every page found, keyed by canonical URL,
+            None for pages that could not be fetched.
+    """
+    url = canonicalize_url(url) or url
+    page_texts = crawl_pages(
+        url,
+        depth,
+        extract_links_and_text_from_html,
+        max_concurrency=max_concurrency,
+        max_connections_per_host=max_connections_per_host,
+        http_cache=http_cache,
+        seed_links=get_seed_links(url) if use_sitemap else None,
+        budget=CrawlBudget(max_pages, max_bytes),
+        inlink_counts=inlink_counts,
+    )
+
+    if http_cache is not None:
+        http_cache.save()
+
+    logging.info(f"Extracted all pages, count: {len(page_texts)}")
+
+    return page_texts
+
+
 def get_clean_links(links: Set[str]) -> Set[str]:
     """
-    Clean and filter a set of links.
+    Canonicalize a set of links, so that variants of the same page are kept once.
 
     Args:
         links (Set[str]): The set of links to clean.
 
     Returns:
-        Set[str]: The cleaned set of links.
+        Set[str]: The cleaned set of links, without non-http(s) links and
+            links to files such as PDFs and images.
     """
-    # Only keep links starting with http://www. or https://www. and remove trailing slashes
+    canonical_links = (canonicalize_url(link) for link in links)
     return {
-        link.rstrip("/")
-        for link in links
-        if link.startswith(("https://www.", "http://www."))
+        link
+        for link in canonical_links
+        if link is not None and not has_non_html_extension(link)
     }
 
 
@@ -115,6 +289,9 @@ def filter_same_domain_links(links: Set[str], url: str) -> Set[str]:
     """
     Filter links to keep only those within the same domain as the given URL.
 
+    Links to the "www." and bare variants of the domain are both kept, and
+    rewritten to the scheme and host of the given URL, so each page has one URL.
+
     Args:
         links (Set[str]): The set of links to filter.
         url (str): The reference URL to determine the domain.
@@ -123,8 +300,16 @@ def filter_same_domain_links(links: Set[str], url: str) -> Set[str]:
         Set[str]: The filtered set of links.
     """
     # Extract the domain from the URL
-    domain = urlparse(url).netloc
-    return {link for link in links if urlparse(link).netloc == domain}
+    parsed_url = urlparse(canonicalize_url(url) or url)
+    site_host = get_site_host(url)
+
+    return {
+        urlunparse(
+            urlparse(link)._replace(scheme=parsed_url.scheme, netloc=parsed_url.netloc)
+        )
+        for link in links
+        if get_site_host(link) == site_host
+    }
 
 
 def main():
@@ -146,7 +331,14 @@ def main():
     os.makedirs(domain_folder_name_relative, exist_ok=True)
 
     # Extract links and save them to a JSON file
-    links = get_all_links(args.url, args.depth)
+    links = get_all_links(
+        args.url,
+        args.depth,
+        max_concurrency=args.max_concurrency,
+        max_pages=args.max_pages,
+        max_bytes=args.max_bytes,
+        use_sitemap=not args.no_sitemap,
+    )
     logging.info(
         f"Extracted {len(links)} links from URL: {args.url} with depth: {args.depth}"
     )
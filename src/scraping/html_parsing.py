@@ -0,0 +1,237 @@
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+# Version of the parsed page content, bump it whenever parsing changes the links,
+# text or canonical URL of a page, so parses cached by older versions are discarded
+PARSER_VERSION = 2
+
+# Parser used when none is given; "lxml" is several times faster than the
+# pure Python "html.parser" of BeautifulSoup, which is used if lxml is missing
+DEFAULT_BACKEND = "lxml"
+
+# Elements whose content is never page text
+BOILERPLATE_TAGS = (
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "iframe",
+    "nav",
+    "footer",
+)
+
+# Elements that start a new line of text
+BLOCK_TAGS = (
+    "address",
+    "article",
+    "aside",
+    "blockquote",
+    "br",
+    "dd",
+    "div",
+    "dl",
+    "dt",
+    "figcaption",
+    "figure",
+    "form",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "header",
+    "hr",
+    "li",
+    "main",
+    "ol",
+    "p",
+    "pre",
+    "section",
+    "table",
+    "td",
+    "th",
+    "tr",
+    "ul",
+)
+
+
+class ParsedHtml(NamedTuple):
+    hrefs: List[str]
+    text: str
+    canonical: Optional[str] = None
+
+
+def collapse_whitespace(text: str) -> str:
+    """
+    Collapse runs of whitespace inside lines and drop empty lines.
+
+    Args:
+        text (str): Text to clean.
+
+    Returns:
+        str: Text with single spaces and no empty lines.
+    """
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def parse_with_lxml(html: str) -> ParsedHtml:
+    """
+    Parse a page with lxml.
+
+    Args:
+        html (str): HTML content of the page.
+
+    Returns:
+        ParsedHtml: Links and text of the page.
+    """
+    import lxml.etree
+    import lxml.html
+
+    try:
+        root = lxml.html.fromstring(
+            html.encode("utf-8"), parser=lxml.html.HTMLParser(encoding="utf-8")
+        )
+    except (lxml.etree.ParserError, ValueError):
+        return ParsedHtml([], "")
+
+    # Links are collected before boilerplate is dropped, navigation links are needed to crawl
+    hrefs = [str(href) for href in root.xpath("//a/@href")]
+    canonical = next(
+        (
+            link.get("href")
+            for link in root.iter("link")
+            if "canonical" in (link.get("rel") or "").lower().split()
+            and link.get("href")
+        ),
+        None,
+    )
+
+    # Comments and processing instructions outside of the root element have no
+    # parent and cannot be dropped, strip_elements only removes descendants
+    lxml.etree.strip_elements(
+        root,
+        *BOILERPLATE_TAGS,
+        lxml.etree.Comment,
+        lxml.etree.ProcessingInstruction,
+        with_tail=False,
+    )
+
+    for element in root.iter(*BLOCK_TAGS):
+        element.tail = "\n" + (element.tail or "")
+        element.text = "\n" + (element.text or "")
+
+    return ParsedHtml(hrefs, collapse_whitespace(root.text_content()), canonical)
+
+
+def parse_with_html_parser(html: str) -> ParsedHtml:
+    """
+    Parse a page with BeautifulSoup and the Python HTML parser.
+
+    The tree is walked once, collecting links everywhere and text outside of
+    boilerplate elements.
+
+    Args:
+        html (str): HTML content of the page.
+
+    Returns:
+        ParsedHtml: Links and text of the page.
+    """
+    from bs4 import BeautifulSoup, NavigableString, Tag
+
+    soup = BeautifulSoup(html, "html.parser")
+    boilerplate_tags = set(BOILERPLATE_TAGS)
+    block_tags = set(BLOCK_TAGS)
+
+    hrefs = []
+    canonical = None
+    text_parts = []
+    # Nodes to visit with whether they are inside boilerplate, in reverse document order
+    stack = [(soup, False)]
+
+    while stack:
+        node, in_boilerplate = stack.pop()
+
+        if isinstance(node, Tag):
+            if node.name == "a" and node.get("href") is not None:
+                hrefs.append(node["href"])
+            elif (
+                node.name == "link"
+                and canonical is None
+                and "canonical" in [rel.lower() for rel in node.get("rel", [])]
+                and node.get("href")
+            ):
+                canonical = node["href"]
+
+            in_boilerplate = in_boilerplate or node.name in boilerplate_tags
+            if node.name in block_tags and not in_boilerplate:
+                text_parts.append("\n")
+                stack.append(("\n", False))
+
+            stack.extend((child, in_boilerplate) for child in reversed(node.contents))
+        elif not in_boilerplate and type(node) in (NavigableString, str):
+            # Comments, doctypes and other special strings are not text
+            text_parts.append(node)
+
+    return ParsedHtml(hrefs, collapse_whitespace("".join(text_parts)), canonical)
+
+
+BACKENDS: Dict[str, Callable[[str], ParsedHtml]] = {
+    "lxml": parse_with_lxml,
+    "html.parser": parse_with_html_parser,
+}
+
+
+def get_backend(backend: Optional[str] = None) -> Callable[[str], ParsedHtml]:
+    """
+    Get the parse function of a backend, falling back to html.parser if lxml is not installed.
+
+    Args:
+        backend (Optional[str]): Name of the backend, DEFAULT_BACKEND if None.
+
+    Returns:
+        Callable[[str], ParsedHtml]: Parse function.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend: {backend}")
+
+    if backend == "lxml":
+        try:
+            import lxml.html  # noqa: F401
+        except ImportError:
+            logging.warning("lxml is not installed, parsing HTML with html.parser")
+            backend = "html.parser"
+
+    return BACKENDS[backend]
+
+
+def parse_html(html: str, backend: Optional[str] = None) -> ParsedHtml:
+    """
+    Parse a page once into its links and its text without boilerplate.
+
+    Scripts, styles, navigation menus and footers are left out of the text,
+    and whitespace is collapsed. Pages lxml fails on are parsed with html.parser.
+
+    Args:
+        html (str): HTML content of the page.
+        backend (Optional[str]): Name of the parser backend, DEFAULT_BACKEND if None.
+
+    Returns:
+        ParsedHtml: Links (raw href values), text and rel=canonical href of the page.
+    """
+    parse = get_backend(backend)
+    if parse is parse_with_html_parser:
+        return parse(html)
+
+    # One unusual page must not abort a crawl, html.parser copes with any input
+    try:
+        return parse(html)
+    except Exception as e:
+        logging.warning(f"Could not parse page with lxml, using html.parser: {e!r}")
+        return parse_with_html_parser(html)
@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+from typing import Dict, Optional, Set, Tuple
+
+from src.scraping.html_parsing import PARSER_VERSION
+from src.utils import HTTP_CACHE_FILENAME
+
+
+class HttpCache:
+    def __init__(self, path: str):
+        """
+        Initialize the HTTP cache of a domain, loading previous entries from disk.
+
+        Every entry keeps the ETag and Last-Modified validators of a page together
+        with the links and text parsed from it, so an unchanged page needs neither
+        a download nor a parse. Entries parsed by another PARSER_VERSION are misses,
+        so pages are parsed again when parsing changes.
+
+        Args:
+            path (str): Domain data folder where the cache file is stored.
+        """
+        self.file_path = os.path.join(path, HTTP_CACHE_FILENAME)
+        self.entries = {}
+        self.n_hits = 0
+
+        if os.path.exists(self.file_path):
+            with open(self.file_path, "r") as json_file:
+                self.entries = json.load(json_file)
+            logging.info(
+                f"HTTP cache loaded from: {self.file_path}, entries: {len(self.entries)}"
+            )
+
+    def get_entry(self, url: str) -> Optional[dict]:
+        """
+        Get the entry of a page, if it was parsed by the current parser version.
+
+        Args:
+            url (str): URL of the page.
+
+        Returns:
+            Optional[dict]: Entry of the page, None if not cached or outdated.
+        """
+        entry = self.entries.get(url)
+        if entry is None or entry.get("parser_version") != PARSER_VERSION:
+            return None
+        return entry
+
+    def get_conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Build conditional request headers for a cached page.
+
+        Args:
+            url (str): URL of the page.
+
+        Returns:
+            Dict[str, str]: If-None-Match / If-Modified-Since headers, empty if not cached.
+        """
+        entry = self.get_entry(url)
+        headers = {}
+
+        if entry is None:
+            return headers
+
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        return headers
+
+    def get(self, url: str) -> Optional[Tuple[Set[str], str, Optional[str]]]:
+        """
+        Get the parsed links, text and canonical URL of a cached page.
+
+        Args:
+            url (str): URL of the page.
+
+        Returns:
+            Optional[Tuple[Set[str], str, Optional[str]]]: Links, text and canonical URL
+                of the page, None if not cached.
+        """
+        entry = self.get_entry(url)
+        if entry is None:
+            return None
+
+        self.n_hits += 1
+        return set(entry["links"]), entry["text"], entry.get("canonical")
+
+    def update(
+        self,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        links: Set[str],
+        text: str,
+        canonical: Optional[str] = None,
+    ) -> None:
+        """
+        Store the validators and parsed content of a page.
+
+        Pages served without validators are not cached, as they cannot be revalidated.
+
+        Args:
+            url (str): URL of the page.
+            etag (Optional[str]): ETag header of the response.
+            last_modified (Optional[str]): Last-Modified header of the response.
+            links (Set[str]): Links parsed from the page.
+            text (str): Text parsed from the page.
+            canonical (Optional[str]): Canonical URL declared by the page.
+        """
+        if not (etag or last_modified):
+            self.entries.pop(url, None)
+            return
+
+        self.entries[url] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "links": sorted(links),
+            "text": text,
+            "canonical": canonical,
+            "parser_version": PARSER_VERSION,
+        }
+
+    def save(self) -> None:
+        """
+        Write the cache to disk.
+        """
+        tmp_file_path = self.file_path + ".tmp"
+        with open(tmp_file_path, "w") as json_file:
+            json.dump(self.entries, json_file)
+        os.replace(tmp_file_path, self.file_path)
+
+        logging.info(
+            f"HTTP cache saved to: {self.file_path}, entries: {len(self.entries)}, "
+            f"not modified pages: {self.n_hits}"
+        )
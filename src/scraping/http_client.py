@@ -0,0 +1,352 @@
+import asyncio
+import logging
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Time allowed to open a connection to a host, in seconds
+CONNECT_TIMEOUT_SECONDS = 10
+
+# Time allowed between two chunks of a response, in seconds
+READ_TIMEOUT_SECONDS = 30
+
+# Number of retries after the first attempt for failed requests
+MAX_RETRIES = 3
+
+# Base delay of the exponential backoff between retries, in seconds
+BACKOFF_FACTOR = 0.5
+
+# Longest delay accepted from a Retry-After header, in seconds
+MAX_RETRY_AFTER_SECONDS = 60
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Status codes meaning that a page no longer exists, unlike transient failures
+GONE_STATUS_CODES = (404, 410)
+
+# Responses larger than this are truncated, in bytes
+MAX_RESPONSE_BYTES = 5 * 1024 * 1024
+
+# Size of the chunks a response body is read in, in bytes
+CHUNK_SIZE_BYTES = 64 * 1024
+
+# Maximum number of open connections to a single host
+MAX_CONNECTIONS_PER_HOST = 8
+
+# How long an idle connection is kept open for reuse, in seconds
+KEEPALIVE_TIMEOUT_SECONDS = 30
+
+# Content types of pages worth parsing, responses of other types are skipped unread
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+USER_AGENT = "Mozilla/5.0 (compatible; sales-automation-scraper/1.0)"
+
+# Shared blocking session, created on first use
+_session: Optional[requests.Session] = None
+
+
+class CappedRetry(Retry):
+    """
+    Retry policy waiting at most MAX_RETRY_AFTER_SECONDS when a server sends Retry-After.
+    """
+
+    def get_retry_after(self, response) -> Optional[float]:
+        """
+        Get the delay requested by the Retry-After header of a response, capped.
+
+        Args:
+            response (urllib3.BaseHTTPResponse): Response to retry.
+
+        Returns:
+            Optional[float]: Delay in seconds, None if the header is absent.
+        """
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, MAX_RETRY_AFTER_SECONDS)
+
+
+def get_session() -> requests.Session:
+    """
+    Get the blocking HTTP session shared by all scraping requests.
+
+    The session keeps connections alive, pools them per host and retries
+    rate-limited and transient server errors with exponential backoff,
+    waiting at most MAX_RETRY_AFTER_SECONDS when asked to by the server.
+
+    Returns:
+        requests.Session: Shared session.
+    """
+    global _session
+
+    if _session is None:
+        retry = CappedRetry(
+            total=MAX_RETRIES,
+            backoff_factor=BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=("GET", "HEAD"),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_maxsize=MAX_CONNECTIONS_PER_HOST, max_retries=retry)
+
+        session = requests.Session()
+        session.headers["User-Agent"] = USER_AGENT
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session = session
+
+    return _session
+
+
+def decode_body(body: bytes, encoding: Optional[str]) -> str:
+    """
+    Decode a response body, falling back to UTF-8 for missing or unknown encodings.
+
+    Args:
+        body (bytes): Raw response body.
+        encoding (Optional[str]): Encoding declared by the server, if any.
+
+    Returns:
+        str: Decoded text.
+    """
+    try:
+        return bytes(body).decode(encoding or "utf-8", errors="replace")
+    except LookupError:
+        return bytes(body).decode("utf-8", errors="replace")
+
+
+def is_accepted_content_type(
+    content_type: Optional[str], content_types: Optional[Tuple[str, ...]]
+) -> bool:
+    """
+    Check whether the Content-Type header of a response is one of the accepted types.
+
+    Args:
+        content_type (Optional[str]): Content-Type header, e.g. "text/html; charset=utf-8".
+        content_types (Optional[Tuple[str, ...]]): Accepted media types, any if None.
+
+    Returns:
+        bool: True if accepted. Responses without a Content-Type are accepted.
+    """
+    if content_types is None or not content_type:
+        return True
+    return content_type.split(";")[0].strip().lower() in content_types
+
+
+def get_text(
+    url: str, content_types: Optional[Tuple[str, ...]] = HTML_CONTENT_TYPES
+) -> Optional[str]:
+    """
+    Fetch the body of one URL as text with the shared blocking session.
+
+    Args:
+        url (str): URL to fetch.
+        content_types (Optional[Tuple[str, ...]]): Accepted media types, any if None.
+
+    Returns:
+        Optional[str]: Text of the response, or None if the request failed or
+            the response is of another content type.
+    """
+    try:
+        with get_session().get(
+            url,
+            timeout=(CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS),
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+
+            content_type = response.headers.get("Content-Type")
+            if not is_accepted_content_type(content_type, content_types):
+                logging.info(f"Skipping {url} of content type: {content_type}")
+                return None
+
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE_BYTES):
+                body += chunk
+                if len(body) > MAX_RESPONSE_BYTES:
+                    logging.warning(
+                        f"Response from {url} exceeds {MAX_RESPONSE_BYTES} bytes, truncating"
+                    )
+                    break
+
+            return decode_body(body[:MAX_RESPONSE_BYTES], response.encoding)
+    except requests.RequestException as e:
+        logging.error(f"Error fetching the URL {url}: {e}")
+        return None
+
+
+def get_html(url: str) -> Optional[str]:
+    """
+    Fetch the HTML of one page with the shared blocking session.
+
+    Args:
+        url (str): URL of the page.
+
+    Returns:
+        Optional[str]: HTML of the page, or None if the request failed or it is not HTML.
+    """
+    return get_text(url)
+
+
+def create_async_session(
+    max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+) -> aiohttp.ClientSession:
+    """
+    Create an async HTTP session shared by all requests of one crawl.
+
+    Args:
+        max_connections_per_host (int): Maximum number of open connections to one host.
+
+    Returns:
+        aiohttp.ClientSession: Session with a pooled keep-alive connector.
+    """
+    connector = aiohttp.TCPConnector(
+        limit_per_host=max_connections_per_host,
+        keepalive_timeout=KEEPALIVE_TIMEOUT_SECONDS,
+    )
+    timeout = aiohttp.ClientTimeout(
+        sock_connect=CONNECT_TIMEOUT_SECONDS, sock_read=READ_TIMEOUT_SECONDS
+    )
+    return aiohttp.ClientSession(
+        connector=connector, timeout=timeout, headers={"User-Agent": USER_AGENT}
+    )
+
+
+def get_retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Compute how long to wait before retrying a request.
+
+    Args:
+        attempt (int): Number of the failed attempt, starting from 0.
+        retry_after (Optional[str]): Value of the Retry-After header, if any.
+
+    Returns:
+        float: Delay in seconds.
+    """
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), MAX_RETRY_AFTER_SECONDS)
+        except ValueError:
+            pass
+    return BACKOFF_FACTOR * 2**attempt
+
+
+class FetchResult(NamedTuple):
+    """
+    Outcome of an HTTP request answered by the server.
+    """
+
+    status: int
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    # Number of body bytes downloaded
+    size: int = 0
+    # Whether the response is of another content type and its body was not read
+    skipped: bool = False
+
+
+async def async_fetch(
+    session: aiohttp.ClientSession,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    content_types: Optional[Tuple[str, ...]] = HTML_CONTENT_TYPES,
+) -> Optional[FetchResult]:
+    """
+    Fetch one page, retrying rate-limited and transient server errors.
+
+    A 304 Not Modified answer to a conditional request is returned with empty text,
+    and so is a 404 Not Found or 410 Gone answer, so that removed pages can be
+    told apart from failed requests.
+    The Content-Type header is checked before the body is read, so PDFs, images
+    and other files are not downloaded, they are returned as skipped.
+
+    Args:
+        session (aiohttp.ClientSession): Shared async HTTP session.
+        url (str): URL of the page.
+        headers (Optional[Dict[str, str]]): Extra request headers, e.g. If-None-Match.
+        content_types (Optional[Tuple[str, ...]]): Accepted media types, any if None.
+
+    Returns:
+        Optional[FetchResult]: Status, text and cache validators of the response,
+            or None if the request failed.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        retry_after = None
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status in RETRY_STATUS_CODES and attempt < MAX_RETRIES:
+                    retry_after = response.headers.get("Retry-After")
+                    logging.warning(f"Got status {response.status} for {url}, retrying")
+                elif response.status in GONE_STATUS_CODES:
+                    logging.info(
+                        f"Page {url} no longer exists, status {response.status}"
+                    )
+                    return FetchResult(
+                        status=response.status, text="", etag=None, last_modified=None
+                    )
+                else:
+                    response.raise_for_status()
+
+                    content_type = response.headers.get("Content-Type")
+                    if not is_accepted_content_type(content_type, content_types):
+                        logging.info(f"Skipping {url} of content type: {content_type}")
+                        return FetchResult(
+                            status=response.status,
+                            text="",
+                            etag=None,
+                            last_modified=None,
+                            skipped=True,
+                        )
+
+                    body = bytearray()
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE_BYTES):
+                        body += chunk
+                        if len(body) > MAX_RESPONSE_BYTES:
+                            logging.warning(
+                                f"Response from {url} exceeds {MAX_RESPONSE_BYTES} bytes, truncating"
+                            )
+                            break
+
+                    return FetchResult(
+                        status=response.status,
+                        text=decode_body(body[:MAX_RESPONSE_BYTES], response.charset),
+                        etag=response.headers.get("ETag"),
+                        last_modified=response.headers.get("Last-Modified"),
+                        size=len(body),
+                    )
+        except aiohttp.ClientResponseError as e:
+            logging.error(f"Error fetching the URL {url}: {e}")
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt == MAX_RETRIES:
+                logging.error(f"Error fetching the URL {url}: {e}")
+                return None
+            logging.warning(f"Error fetching the URL {url}: {e}, retrying")
+
+        await asyncio.sleep(get_retry_delay(attempt, retry_after))
+
+    return None
+
+
+async def async_get_html(session: aiohttp.ClientSession, url: str) -> Optional[str]:
+    """
+    Fetch the HTML of one page, retrying rate-limited and transient server errors.
+
+    Args:
+        session (aiohttp.ClientSession): Shared async HTTP session.
+        url (str): URL of the page.
+
+    Returns:
+        Optional[str]: HTML of the page, or None if the request failed,
+            the page no longer exists or it is not HTML.
+    """
+    result = await async_fetch(session, url)
+    if result is None or result.status in GONE_STATUS_CODES or result.skipped:
+        return None
+    return result.text
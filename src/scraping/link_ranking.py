@@ -0,0 +1,135 @@
+import math
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+# Weights of words in a URL path, pages about the offering score higher
+KEYWORD_WEIGHTS = {
+    "product": 3.0,
+    "products": 3.0,
+    "pricing": 3.0,
+    "price": 2.5,
+    "prices": 2.5,
+    "plans": 2.5,
+    "features": 2.5,
+    "solution": 2.5,
+    "solutions": 2.5,
+    "service": 2.5,
+    "services": 2.5,
+    "platform": 2.0,
+    "benefits": 2.0,
+    "why": 2.0,
+    "how": 1.5,
+    "about": 2.0,
+    "company": 1.5,
+    "mission": 1.5,
+    "team": 1.0,
+    "customers": 1.5,
+    "case": 1.5,
+    "studies": 1.5,
+    "testimonials": 1.5,
+    "reviews": 1.5,
+    "compare": 1.5,
+    "vs": 1.0,
+    "integrations": 1.0,
+    "shop": 1.5,
+    "menu": 1.5,
+    "faq": 1.0,
+    # Pages with little to say about the company
+    "login": -4.0,
+    "signin": -4.0,
+    "signup": -3.0,
+    "register": -3.0,
+    "account": -3.0,
+    "cart": -4.0,
+    "checkout": -4.0,
+    "privacy": -3.0,
+    "terms": -3.0,
+    "cookie": -3.0,
+    "cookies": -3.0,
+    "legal": -3.0,
+    "careers": -2.0,
+    "jobs": -2.0,
+    "tag": -2.5,
+    "tags": -2.5,
+    "category": -1.5,
+    "author": -2.5,
+    "page": -1.0,
+    "search": -3.0,
+    "feed": -3.0,
+}
+
+# Score lost for every path segment below the home page
+DEPTH_PENALTY = 1.0
+
+# Score of the home page, which usually sums up the company
+HOME_PAGE_SCORE = 5.0
+
+# Weight of the logarithm of the number of crawled pages linking to a page
+INLINK_WEIGHT = 1.0
+
+# Score lost by URLs with a query string, which are mostly filters and listings
+QUERY_PENALTY = 1.0
+
+
+def get_path_words(url: str) -> List[str]:
+    """
+    Split the path of a URL into lowercase words.
+
+    Args:
+        url (str): URL to split.
+
+    Returns:
+        List[str]: Words of the path, e.g. ["case", "studies", "acme"].
+    """
+    return [
+        word for word in re.split(r"[^a-z0-9]+", urlparse(url).path.lower()) if word
+    ]
+
+
+def score_link(url: str, n_inlinks: int = 0) -> float:
+    """
+    Score how useful a page is likely to be for summarizing the company, from its URL.
+
+    Args:
+        url (str): URL of the page.
+        n_inlinks (int): Number of crawled pages linking to the page.
+
+    Returns:
+        float: Score, higher is more useful.
+    """
+    parsed_url = urlparse(url)
+    segments = [segment for segment in parsed_url.path.split("/") if segment]
+
+    if not segments and not parsed_url.query:
+        return HOME_PAGE_SCORE + INLINK_WEIGHT * math.log1p(n_inlinks)
+
+    keyword_score = sum(
+        KEYWORD_WEIGHTS.get(word, 0.0) for word in set(get_path_words(url))
+    )
+
+    return (
+        keyword_score
+        - DEPTH_PENALTY * len(segments)
+        - (QUERY_PENALTY if parsed_url.query else 0.0)
+        + INLINK_WEIGHT * math.log1p(n_inlinks)
+    )
+
+
+def rank_links(
+    links: List[str], inlink_counts: Optional[Dict[str, int]] = None
+) -> List[str]:
+    """
+    Rank links by score, without any request.
+
+    Args:
+        links (List[str]): Links to rank.
+        inlink_counts (Optional[Dict[str, int]]): Number of crawled pages linking
+            to each link. Links are ranked from their URL only if None.
+
+    Returns:
+        List[str]: Links from the most to the least useful, links with the same
+            score keep their order.
+    """
+    inlink_counts = inlink_counts or {}
+    return sorted(links, key=lambda link: -score_link(link, inlink_counts.get(link, 0)))
@@ -0,0 +1,110 @@
+import logging
+import xml.etree.ElementTree as ElementTree
+from typing import List, Tuple
+from urllib.parse import urljoin
+
+from src.scraping.http_client import get_text
+
+ROBOTS_TXT_PATH = "/robots.txt"
+
+# Sitemap looked for when robots.txt does not declare any
+DEFAULT_SITEMAP_PATH = "/sitemap.xml"
+
+# Maximum number of sitemap files fetched for one site, sitemap indexes included
+MAX_SITEMAPS = 5
+
+
+def get_sitemaps_from_robots_txt(robots_txt: str, url: str) -> List[str]:
+    """
+    Get the sitemap URLs declared in a robots.txt file.
+
+    Args:
+        robots_txt (str): Content of the robots.txt file.
+        url (str): URL of the site, used to resolve relative sitemap URLs.
+
+    Returns:
+        List[str]: Sitemap URLs in declaration order.
+    """
+    sitemaps = []
+    for line in robots_txt.splitlines():
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "sitemap" and value.strip():
+            sitemaps.append(urljoin(url, value.strip()))
+    return sitemaps
+
+
+def parse_sitemap(xml: str) -> Tuple[List[str], List[str]]:
+    """
+    Parse a sitemap or a sitemap index.
+
+    Args:
+        xml (str): Content of the sitemap.
+
+    Returns:
+        Tuple[List[str], List[str]]: Page URLs of a sitemap and sitemap URLs
+            of a sitemap index, both empty if the content is not a sitemap.
+    """
+    try:
+        root = ElementTree.fromstring(xml.strip())
+    except ElementTree.ParseError as e:
+        logging.warning(f"Could not parse sitemap: {e}")
+        return [], []
+
+    # Tags are namespaced, e.g. "{http://www.sitemaps.org/schemas/sitemap/0.9}loc"
+    locations = [
+        element.text.strip()
+        for element in root.iter()
+        if element.tag.rsplit("}", 1)[-1] == "loc" and element.text
+    ]
+
+    if root.tag.rsplit("}", 1)[-1] == "sitemapindex":
+        return [], locations
+    return locations, []
+
+
+def get_sitemap_links(url: str, max_sitemaps: int = MAX_SITEMAPS) -> List[str]:
+    """
+    Get the page URLs listed in the sitemaps of a site.
+
+    Sitemaps are read from robots.txt, or from /sitemap.xml if robots.txt declares
+    none. Sitemap indexes are followed until max_sitemaps files have been fetched.
+    Compressed sitemaps are skipped.
+
+    Args:
+        url (str): URL of the site.
+        max_sitemaps (int): Maximum number of sitemap files fetched.
+
+    Returns:
+        List[str]: Page URLs in sitemap order, without duplicates. They are not
+            filtered, they may be on other domains.
+    """
+    robots_txt = get_text(urljoin(url, ROBOTS_TXT_PATH), content_types=None)
+    sitemaps = get_sitemaps_from_robots_txt(robots_txt or "", url) or [
+        urljoin(url, DEFAULT_SITEMAP_PATH)
+    ]
+
+    links = {}
+    seen_sitemaps = set()
+    n_fetched = 0
+
+    while sitemaps and n_fetched < max_sitemaps:
+        sitemap = sitemaps.pop(0)
+        if sitemap in seen_sitemaps or sitemap.lower().endswith(".gz"):
+            continue
+        seen_sitemaps.add(sitemap)
+
+        xml = get_text(sitemap, content_types=None)
+        n_fetched += 1
+        if xml is None:
+            continue
+
+        page_links, sitemap_links = parse_sitemap(xml)
+        links.update(dict.fromkeys(page_links))
+        sitemaps.extend(sitemap_links)
+
+    logging.info(
+        f"Found {len(links)} links in {n_fetched} sitemaps of {url}"
+        + (f", {len(sitemaps)} sitemaps left unread" if sitemaps else "")
+    )
+
+    return list(links)
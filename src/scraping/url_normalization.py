@@ -0,0 +1,171 @@
+import posixpath
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMETERS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "yclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "_ga",
+    "_gl",
+    "_hsenc",
+    "_hsmi",
+    "srsltid",
+}
+TRACKING_PARAMETER_PREFIXES = ("utm_", "pk_", "mtm_", "hsa_")
+
+# Query parameters carrying a session id
+SESSION_PARAMETERS = {
+    "sid",
+    "sessionid",
+    "session_id",
+    "phpsessid",
+    "jsessionid",
+    "aspsessionid",
+    "cfid",
+    "cftoken",
+}
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Extensions of files that are not web pages, links to them are not crawled
+NON_HTML_EXTENSIONS = {
+    ".7z",
+    ".avi",
+    ".bmp",
+    ".css",
+    ".csv",
+    ".dmg",
+    ".doc",
+    ".docx",
+    ".eps",
+    ".exe",
+    ".gif",
+    ".gz",
+    ".ico",
+    ".jpeg",
+    ".jpg",
+    ".js",
+    ".json",
+    ".m4a",
+    ".mov",
+    ".mp3",
+    ".mp4",
+    ".mpeg",
+    ".ogg",
+    ".pdf",
+    ".png",
+    ".ppt",
+    ".pptx",
+    ".rar",
+    ".rss",
+    ".svg",
+    ".tar",
+    ".tif",
+    ".tiff",
+    ".ttf",
+    ".wav",
+    ".webm",
+    ".webp",
+    ".woff",
+    ".woff2",
+    ".xls",
+    ".xlsx",
+    ".xml",
+    ".zip",
+}
+
+
+def is_ignored_parameter(name: str) -> bool:
+    """
+    Check whether a query parameter is a tracking or session parameter.
+
+    Args:
+        name (str): Name of the query parameter.
+
+    Returns:
+        bool: True if the parameter does not change the page.
+    """
+    name = name.lower()
+    return (
+        name in TRACKING_PARAMETERS
+        or name in SESSION_PARAMETERS
+        or name.startswith(TRACKING_PARAMETER_PREFIXES)
+    )
+
+
+def has_non_html_extension(url: str) -> bool:
+    """
+    Check whether a URL points to a file that is not a web page, from its extension.
+
+    Args:
+        url (str): URL to check.
+
+    Returns:
+        bool: True if the path ends with an extension of NON_HTML_EXTENSIONS.
+    """
+    extension = posixpath.splitext(urlparse(url).path)[1].lower()
+    return extension in NON_HTML_EXTENSIONS
+
+
+def get_site_host(url: str) -> str:
+    """
+    Get the host of a URL without "www.", so that both variants of a site match.
+
+    Args:
+        url (str): URL to get the host of.
+
+    Returns:
+        str: Lowercase host, with its port if it is not the default one.
+    """
+    host = urlparse(canonicalize_url(url) or url).netloc.lower()
+    return host[len("www.") :] if host.startswith("www.") else host
+
+
+def canonicalize_url(url: str) -> Optional[str]:
+    """
+    Normalize a URL so that variants of the same page get the same URL.
+
+    The fragment, tracking and session parameters, path parameters such as
+    ";jsessionid=..." and the trailing slash are removed, the scheme and host
+    are lowercased, the default port is dropped and the remaining query
+    parameters are sorted.
+
+    Args:
+        url (str): Absolute URL.
+
+    Returns:
+        Optional[str]: Canonical URL, None if it is not an http(s) URL.
+    """
+    try:
+        parsed_url = urlparse(url.strip())
+        port = parsed_url.port
+    except ValueError:
+        return None
+
+    scheme = parsed_url.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parsed_url.hostname:
+        return None
+
+    host = parsed_url.hostname.rstrip(".")
+    # urlparse drops the brackets of IPv6 addresses, they are needed in a URL
+    if ":" in host:
+        host = f"[{host}]"
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+
+    query = urlencode(
+        sorted(
+            (name, value)
+            for name, value in parse_qsl(parsed_url.query, keep_blank_values=True)
+            if not is_ignored_parameter(name)
+        )
+    )
+
+    return urlunparse((scheme, host, parsed_url.path.rstrip("/"), "", query, ""))
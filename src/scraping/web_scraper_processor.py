@@ -1,11 +1,16 @@
-from typing import List
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
 
 from src.generative_ai_utils import get_company_facts_and_summary
 from src.scraping.extract_all_links_and_summary_text import (
     find_best_links_for_summary,
-    fetch_html_website_and_summary_content,
+    fetch_page_texts,
+    build_website_and_summary_info,
+    SELECT_LINKS_WITH_LLM,
 )
-from src.scraping.get_links_to_scrape import get_all_links
+from src.scraping.get_links_to_scrape import get_all_links, get_all_pages
+from src.scraping.async_crawler import MAX_CONCURRENT_REQUESTS
+from src.scraping.http_cache import HttpCache
 from src.utils import *
 
 # Constants
@@ -14,29 +19,110 @@ N_MAX_SUMMARY_LINKS = 10
 
 
 class WebScraperProcessor:
-    def __init__(self, url: str):
+    def __init__(
+        self,
+        url: str,
+        max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+        single_pass: bool = True,
+        refresh: bool = False,
+        select_links_with_llm: bool = SELECT_LINKS_WITH_LLM,
+    ):
         """
         Initialize WebScraperProcessor with a URL and setup data path.
 
         Args:
             url (str): URL of the website to be scraped.
+            max_concurrency (int): Maximum number of pages fetched at the same time.
+            single_pass (bool): Whether to fetch each page once for both its links
+                and its text, instead of crawling links and fetching texts separately.
+            refresh (bool): Whether to scrape the website again even if data is saved.
+                Pages are revalidated against the HTTP cache of the domain and the
+                vector index is updated for changed pages only.
+            select_links_with_llm (bool): Whether the LLM chooses the summary links
+                among the best ranked ones, instead of taking the best ranked links.
         """
-        self.summary_info = None
-        self.website_info = None
+        self._summary_info = None
+        self._website_info = None
+        self.all_links = None
+        self.summary_links = None
+        self.changed_links = []
+        self.removed_links = []
         self.url = url
+        self.max_concurrency = max_concurrency
+        self.single_pass = single_pass
+        self.select_links_with_llm = select_links_with_llm
         self.datapath = get_url_datapath(url, create=True)
 
+        if refresh:
+            clear_scraped_data(self.datapath)
+
     def run(self):
         """
         Perform the scraping and data extraction process.
+
+        Page texts are saved as one record per page. The URLs of new or changed
+        pages and of removed pages are kept in changed_links and removed_links,
+        and the company summary is generated again if there are any.
         """
-        all_links = scrape_or_load_all_links(self.datapath, self.url)
-        summary_links = create_or_load_summary_links(self.datapath, all_links)
+        links_are_saved = os.path.exists(
+            os.path.join(self.datapath, ALL_LINKS_FILENAME)
+        )
+        page_texts = None
+        # Filled only when the site is crawled, not when links are loaded from disk
+        inlink_counts = Counter()
+
+        if self.single_pass and not links_are_saved:
+            page_texts = get_all_pages(
+                self.url,
+                depth=DEPTH_TO_SCRAPE,
+                max_concurrency=self.max_concurrency,
+                http_cache=HttpCache(self.datapath),
+                inlink_counts=inlink_counts,
+            )
+            all_links = list(page_texts)
+            save_all_links(self.datapath, all_links)
+        else:
+            all_links = scrape_or_load_all_links(
+                self.datapath, self.url, self.max_concurrency, inlink_counts
+            )
+
+        summary_links = create_or_load_summary_links(
+            self.datapath, all_links, inlink_counts, self.select_links_with_llm
+        )
 
-        website_info, summary_info = fetch_or_load_html_website_and_summary_content(
-            self.datapath, all_links, summary_links
+        self.changed_links, self.removed_links = fetch_or_load_page_records(
+            self.datapath,
+            all_links,
+            self.max_concurrency,
+            page_texts,
+            refetch=not links_are_saved,
         )
-        self.website_info, self.summary_info = website_info, summary_info
+        if self.changed_links or self.removed_links:
+            remove_company_summary_and_facts(self.datapath)
+        self.all_links, self.summary_links = all_links, summary_links
+        self._website_info, self._summary_info = None, None
+
+    @property
+    def website_info(self) -> str:
+        """
+        Text of all pages of the website, assembled from the page records on first access.
+        """
+        if self._website_info is None:
+            self._website_info, self._summary_info = load_website_and_summary_info(
+                self.datapath, self.all_links, self.summary_links
+            )
+        return self._website_info
+
+    @property
+    def summary_info(self) -> str:
+        """
+        Text of the pages selected for summarization, assembled on first access.
+        """
+        if self._summary_info is None:
+            self._website_info, self._summary_info = load_website_and_summary_info(
+                self.datapath, self.all_links, self.summary_links
+            )
+        return self._summary_info
 
     def get_company_facts(self) -> str:
         """
@@ -56,19 +142,32 @@ class WebScraperProcessor:
         return company_facts_and_summary
 
 
-def scrape_or_load_all_links(datapath: str, url: str) -> List[str]:
+def scrape_or_load_all_links(
+    datapath: str,
+    url: str,
+    max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+    inlink_counts: Optional[Counter] = None,
+) -> List[str]:
     """
     Scrape or load all links from a given URL.
 
     Args:
         datapath (str): Path to save or load scraped data.
         url (str): URL to scrape.
+        max_concurrency (int): Maximum number of pages fetched at the same time.
+        inlink_counts (Optional[Counter]): Counter updated with the number of
+            crawled pages linking to each link, when the links are scraped.
 
     Returns:
         List[str]: List of all scraped links.
     """
     if not os.path.exists(os.path.join(datapath, ALL_LINKS_FILENAME)):
-        all_links = get_all_links(url, depth=DEPTH_TO_SCRAPE)
+        all_links = get_all_links(
+            url,
+            depth=DEPTH_TO_SCRAPE,
+            max_concurrency=max_concurrency,
+            inlink_counts=inlink_counts,
+        )
 
         # Save links to json file
         save_all_links(datapath, all_links)
@@ -79,19 +178,29 @@ def scrape_or_load_all_links(datapath: str, url: str) -> List[str]:
     return all_links
 
 
-def create_or_load_summary_links(datapath: str, all_links: List[str]) -> List[str]:
+def create_or_load_summary_links(
+    datapath: str,
+    all_links: List[str],
+    inlink_counts: Optional[Dict[str, int]] = None,
+    use_llm: bool = SELECT_LINKS_WITH_LLM,
+) -> List[str]:
     """
     Create or load summary links from a list of all links.
 
     Args:
         datapath (str): Path to save or load summary links data.
         all_links (List[str]): List of all links.
+        inlink_counts (Optional[Dict[str, int]]): Number of crawled pages linking
+            to each link, used to rank the links.
+        use_llm (bool): Whether the LLM chooses among the best ranked links.
 
     Returns:
         List[str]: List of summary links.
     """
     if not os.path.exists(os.path.join(datapath, SUMMARY_LINKS_FILENAME)):
-        summary_links = find_best_links_for_summary(all_links)[:N_MAX_SUMMARY_LINKS]
+        summary_links = find_best_links_for_summary(
+            all_links, N_MAX_SUMMARY_LINKS, inlink_counts, use_llm
+        )[:N_MAX_SUMMARY_LINKS]
         save_summary_links(datapath, summary_links)
     else:
         summary_links = read_summary_links(datapath)
@@ -99,33 +208,66 @@ def create_or_load_summary_links(datapath: str, all_links: List[str]) -> List[st
     return summary_links
 
 
-def fetch_or_load_html_website_and_summary_content(
-    datapath: str, all_links: List[str], summary_links: List[str]
-) -> tuple[str, str]:
+def fetch_or_load_page_records(
+    datapath: str,
+    all_links: List[str],
+    max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+    page_texts: Optional[Dict[str, Optional[str]]] = None,
+    refetch: bool = False,
+) -> Tuple[List[str], List[str]]:
     """
-    Fetch or load HTML website and summary content from given links.
+    Save page records from crawled texts, or fetch the pages if no page data is saved.
 
     Args:
         datapath (str): Path to save or load fetched data.
         all_links (List[str]): List of all links.
-        summary_links (List[str]): List of summary links.
+        max_concurrency (int): Maximum number of pages fetched at the same time.
+        page_texts (Optional[Dict[str, Optional[str]]]): Texts already extracted
+            during the crawl, keyed by link, None for pages that could not be fetched.
+            Pages are fetched again only when not provided.
+        refetch (bool): Whether to fetch the pages even if page data is saved.
 
     Returns:
-        tuple[str, str]: Website information and summary information.
+        Tuple[List[str], List[str]]: URLs of new or changed pages, and URLs of removed pages.
     """
-    if not (
-        os.path.exists(os.path.join(datapath, WEBSITE_INFO_FILENAME))
-        or os.path.exists(os.path.join(datapath, WEBSITE_SUMMARY_INFO_FILENAME))
-    ):
+    if page_texts is None:
+        if not refetch and (
+            page_records_exist(datapath)
+            or os.path.exists(os.path.join(datapath, WEBSITE_INFO_FILENAME))
+        ):
+            return [], []
 
-        website_info, summary_info = fetch_html_website_and_summary_content(
-            all_links, summary_links
-        )
-        save_website_info(datapath, website_info)
-        save_summary_info(datapath, summary_info)
+        page_texts = fetch_page_texts(all_links, max_concurrency)
 
-    else:
-        website_info = read_website_info(datapath)
-        summary_info = read_summary_info(datapath)
+    return save_page_records(datapath, page_texts)
+
+
+def load_website_and_summary_info(
+    datapath: str,
+    all_links: Optional[List[str]] = None,
+    summary_links: Optional[List[str]] = None,
+) -> Tuple[str, str]:
+    """
+    Assemble website and summary information from the saved page records.
+
+    Folders scraped before page records were introduced are read from
+    the website and summary text files instead.
+
+    Args:
+        datapath (str): Path to the saved data.
+        all_links (Optional[List[str]]): List of all links, read from disk if None.
+        summary_links (Optional[List[str]]): List of summary links, read from disk if None.
+
+    Returns:
+        Tuple[str, str]: Website information and summary information.
+    """
+    if not page_records_exist(datapath):
+        return read_website_info(datapath), read_summary_info(datapath)
+
+    all_links = all_links if all_links is not None else read_all_links(datapath)
+    summary_links = (
+        summary_links if summary_links is not None else read_summary_links(datapath)
+    )
+    page_texts = read_page_texts(datapath, all_links)
 
-    return website_info, summary_info
+    return build_website_and_summary_info(all_links, page_texts, summary_links)
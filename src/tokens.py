@@ -0,0 +1,213 @@
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from src.utils import RELATIVE_FOLDER
+
+if TYPE_CHECKING:
+    import tiktoken
+    from langchain_core.messages import BaseMessage
+
+# Tokenizer files are downloaded once and then loaded from this folder, so
+# token counting works offline afterwards. The folder can be filled ahead of
+# time with "python cli.py --download_tokenizer"
+TOKENIZER_CACHE_FOLDER = os.path.join(RELATIVE_FOLDER, "tiktoken_cache")
+
+# Time before loading a tokenizer is tried again after a failure, in seconds
+TOKENIZER_RETRY_SECONDS = 300
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+DEFAULT_ENCODING = "cl100k_base"
+
+# Context window of each chat model, in tokens
+CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16_385,
+    "gpt-4": 8_192,
+    "gpt-4-turbo": 128_000,
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+}
+
+# Tokens added by the chat format to every message and to the reply
+N_TOKENS_PER_MESSAGE = 3
+N_TOKENS_PER_REPLY = 3
+
+# Fallback used when no tokenizer is available
+N_CHARACTERS_PER_TOKEN = 4
+
+# Loaded tokenizers, and the time loading failed, keyed by encoding name
+_encodings: Dict[str, "tiktoken.Encoding"] = {}
+_failed_at: Dict[str, float] = {}
+
+
+def get_encoding(model: str = DEFAULT_MODEL) -> Optional["tiktoken.Encoding"]:
+    """
+    Get the tokenizer of a model, loaded once per process.
+
+    Failures are not kept for the whole process: loading is tried again
+    TOKENIZER_RETRY_SECONDS after a failure, e.g. once the network is back.
+
+    Args:
+        model (str): Name of the model.
+
+    Returns:
+        Optional[tiktoken.Encoding]: Tokenizer, None if it could not be loaded.
+    """
+    import tiktoken
+
+    os.environ.setdefault("TIKTOKEN_CACHE_DIR", TOKENIZER_CACHE_FOLDER)
+
+    try:
+        encoding_name = tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        encoding_name = DEFAULT_ENCODING
+
+    if encoding_name in _encodings:
+        return _encodings[encoding_name]
+
+    failed_at = _failed_at.get(encoding_name)
+    if failed_at is not None and time.monotonic() - failed_at < TOKENIZER_RETRY_SECONDS:
+        return None
+
+    try:
+        encoding = tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        _failed_at[encoding_name] = time.monotonic()
+        logging.warning(
+            f"Could not load tokenizer {encoding_name}, estimating tokens from characters: {e}"
+        )
+        return None
+
+    _encodings[encoding_name] = encoding
+    _failed_at.pop(encoding_name, None)
+    return encoding
+
+
+def get_context_window(model: str = DEFAULT_MODEL) -> int:
+    """
+    Get the context window of a chat model.
+
+    Args:
+        model (str): Name of the model.
+
+    Returns:
+        int: Context window in tokens.
+    """
+    return CONTEXT_WINDOWS.get(model, CONTEXT_WINDOWS[DEFAULT_MODEL])
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """
+    Count the tokens of a text.
+
+    Args:
+        text (str): Text to count.
+        model (str): Name of the model.
+
+    Returns:
+        int: Number of tokens.
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text) // N_CHARACTERS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(
+    messages: List["BaseMessage"], model: str = DEFAULT_MODEL
+) -> int:
+    """
+    Count the prompt tokens of a list of chat messages.
+
+    Args:
+        messages (List[BaseMessage]): Messages to count.
+        model (str): Name of the model.
+
+    Returns:
+        int: Number of prompt tokens.
+    """
+    return (
+        sum(
+            count_tokens(message.content, model) + N_TOKENS_PER_MESSAGE
+            for message in messages
+        )
+        + N_TOKENS_PER_REPLY
+    )
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = DEFAULT_MODEL) -> str:
+    """
+    Truncate a text to a number of tokens.
+
+    Args:
+        text (str): Text to truncate.
+        max_tokens (int): Maximum number of tokens.
+        model (str): Name of the model.
+
+    Returns:
+        str: Text of at most max_tokens tokens.
+    """
+    max_tokens = max(max_tokens, 0)
+    encoding = get_encoding(model)
+    if encoding is None:
+        # The estimate of count_tokens rounds up, one token is kept for it
+        return text[: max(max_tokens - 1, 0) * N_CHARACTERS_PER_TOKEN]
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def split_to_tokens(
+    text: str, max_tokens: int, model: str = DEFAULT_MODEL
+) -> List[str]:
+    """
+    Split a text into chunks of at most max_tokens tokens, cutting between lines when possible.
+
+    Args:
+        text (str): Text to split.
+        max_tokens (int): Maximum number of tokens of a chunk.
+        model (str): Name of the model.
+
+    Returns:
+        List[str]: Chunks in text order.
+    """
+    encoding = get_encoding(model)
+    chunks = []
+    current_lines = []
+    current_tokens = 0
+
+    def flush() -> None:
+        nonlocal current_lines, current_tokens
+        if current_lines:
+            chunks.append("".join(current_lines))
+        current_lines, current_tokens = [], 0
+
+    for line in text.splitlines(keepends=True):
+        n_tokens = count_tokens(line, model)
+
+        if n_tokens > max_tokens:
+            # Lines longer than a chunk are cut at token boundaries
+            flush()
+            if encoding is None:
+                # The estimate of count_tokens rounds up, one token is kept for it
+                step = max(max_tokens - 1, 1) * N_CHARACTERS_PER_TOKEN
+                chunks.extend(line[i : i + step] for i in range(0, len(line), step))
+            else:
+                tokens = encoding.encode(line, disallowed_special=())
+                chunks.extend(
+                    encoding.decode(tokens[i : i + max_tokens])
+                    for i in range(0, len(tokens), max_tokens)
+                )
+            continue
+
+        if current_tokens + n_tokens > max_tokens:
+            flush()
+        current_lines.append(line)
+        current_tokens += n_tokens
+
+    flush()
+
+    return chunks
@@ -1,8 +1,10 @@
+import hashlib
 import logging
+from datetime import datetime, timezone
 from urllib.parse import urlparse
 import os
 import json
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 ALL_LINKS_FILENAME = "all_links.json"
 SUMMARY_LINKS_FILENAME = "summary_links.json"
@@ -13,6 +15,11 @@ SUMMARY_DICT_KEY = "summary_links"
 WEBSITE_INFO_FILENAME = "website_info.txt"
 WEBSITE_SUMMARY_INFO_FILENAME = "website_summary_info.txt"
 
+HTTP_CACHE_FILENAME = "http_cache.json"
+
+PAGES_FOLDER_NAME = "pages"
+PAGES_INDEX_FILENAME = "index.json"
+
 COMPANY_SUMMARY_AND_FACTS_FILENAME = "company_summary_and_facts.txt"
 LEAD_SUMMARY_AND_FACTS_FILENAME = "lead_summary_and_facts.txt"
 
@@ -22,6 +29,11 @@ PERSONALIZED_MESSAGE_FILENAME = "personalized_message.txt"
 
 RELATIVE_FOLDER = "data/"
 
+BATCH_RESULTS_PATH = os.path.join(RELATIVE_FOLDER, "batch_results.jsonl")
+
+# Maximum number of leads processed at the same time in a batch
+MAX_LEAD_WORKERS = 8
+
 
 def setup_logging(logfile_path: str):
     """
@@ -54,6 +66,30 @@ def get_domain_data_folder(url: str) -> str:
     return folder_name
 
 
+def clear_scraped_data(path: str) -> None:
+    """
+    Remove the scraped website data of a domain so that it is scraped again.
+
+    The HTTP cache and the page records are kept, so unchanged pages are revalidated
+    instead of re-downloaded and changed pages can be told apart after the new scrape.
+    The company summary is kept too, it is removed after the scrape if pages changed.
+
+    Args:
+        path (str): Domain data folder.
+    """
+    for filename in [
+        ALL_LINKS_FILENAME,
+        SUMMARY_LINKS_FILENAME,
+        WEBSITE_INFO_FILENAME,
+        WEBSITE_SUMMARY_INFO_FILENAME,
+    ]:
+        file_path = os.path.join(path, filename)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    logging.info(f"Cleared scraped data in: {path}")
+
+
 def get_url_datapath(url: str, create: bool = True) -> str:
     domain_folder_name = get_domain_data_folder(url)
 
@@ -169,6 +205,13 @@ def read_company_summary_and_facts(path: str) -> str:
     return text
 
 
+def remove_company_summary_and_facts(path: str):
+    file_path = os.path.join(path, COMPANY_SUMMARY_AND_FACTS_FILENAME)
+    if os.path.exists(file_path):
+        os.remove(file_path)
+        logging.info("Removed outdated company summary and facts")
+
+
 def save_lead_summary_and_facts(user_folder: str, text: str):
     save_txt(user_folder, LEAD_SUMMARY_AND_FACTS_FILENAME, text)
     logging.info("Saved lead summary and facts")
@@ -200,3 +243,142 @@ def read_lead_personalized_message(user_folder: str) -> str:
     text = read_txt(user_folder, PERSONALIZED_MESSAGE_FILENAME)
     logging.info("Read lead personalized message")
     return text
+
+
+def get_content_hash(text: str) -> str:
+    """
+    Compute the hash identifying a text content.
+
+    Args:
+        text (str): Text to hash.
+
+    Returns:
+        str: Hex digest of the text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_pages_folder(path: str) -> str:
+    return os.path.join(path, PAGES_FOLDER_NAME)
+
+
+def get_page_filename(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json"
+
+
+def page_records_exist(path: str) -> bool:
+    return os.path.exists(os.path.join(get_pages_folder(path), PAGES_INDEX_FILENAME))
+
+
+def read_pages_index(path: str) -> Dict[str, dict]:
+    """
+    Read the index of the page records of a domain.
+
+    Args:
+        path (str): Domain data folder.
+
+    Returns:
+        Dict[str, dict]: Filename, content hash and fetch time of every page, keyed by URL.
+    """
+    index_path = os.path.join(get_pages_folder(path), PAGES_INDEX_FILENAME)
+    if not os.path.exists(index_path):
+        return {}
+
+    with open(index_path, "r") as json_file:
+        return json.load(json_file)
+
+
+def save_page_records(
+    path: str, page_texts: Dict[str, Optional[str]]
+) -> Tuple[List[str], List[str]]:
+    """
+    Save one record per page (URL, content hash, text, fetch time) in the domain folder.
+
+    Only records of new or changed pages are written, and records of pages that
+    are no longer part of the website are removed. Pages that could not be
+    fetched keep their previous record, if any.
+
+    Args:
+        path (str): Domain data folder.
+        page_texts (Dict[str, Optional[str]]): Text of every page, keyed by URL,
+            None for pages that could not be fetched.
+
+    Returns:
+        Tuple[List[str], List[str]]: URLs of new or changed pages, and URLs of removed pages.
+    """
+    pages_folder = get_pages_folder(path)
+    os.makedirs(pages_folder, exist_ok=True)
+
+    old_index = read_pages_index(path)
+    new_index = {}
+    changed_urls = []
+    fetched_at = datetime.now(timezone.utc).isoformat()
+
+    for url, text in page_texts.items():
+        if text is None:
+            if url in old_index:
+                new_index[url] = old_index[url]
+            continue
+
+        content_hash = get_content_hash(text)
+        filename = get_page_filename(url)
+        new_index[url] = {
+            "filename": filename,
+            "content_hash": content_hash,
+            "fetched_at": fetched_at,
+        }
+
+        if old_index.get(url, {}).get("content_hash") == content_hash:
+            continue
+
+        record = {
+            "url": url,
+            "content_hash": content_hash,
+            "text": text,
+            "fetched_at": fetched_at,
+        }
+        with open(os.path.join(pages_folder, filename), "w") as json_file:
+            json.dump(record, json_file)
+        changed_urls.append(url)
+
+    removed_urls = [url for url in old_index if url not in new_index]
+    for url in removed_urls:
+        file_path = os.path.join(pages_folder, old_index[url]["filename"])
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    with open(os.path.join(pages_folder, PAGES_INDEX_FILENAME), "w") as json_file:
+        json.dump(new_index, json_file, indent=4)
+
+    logging.info(
+        f"Saved page records to: {pages_folder}, pages: {len(new_index)}, "
+        f"changed: {len(changed_urls)}, removed: {len(removed_urls)}"
+    )
+
+    return changed_urls, removed_urls
+
+
+def read_page_texts(path: str, urls: Optional[List[str]] = None) -> Dict[str, str]:
+    """
+    Read the text of saved pages.
+
+    Args:
+        path (str): Domain data folder.
+        urls (Optional[List[str]]): URLs of the pages to read, all saved pages if None.
+
+    Returns:
+        Dict[str, str]: Text of every page, keyed by URL.
+    """
+    pages_folder = get_pages_folder(path)
+    pages_index = read_pages_index(path)
+    page_texts = {}
+
+    for url in pages_index if urls is None else urls:
+        if url not in pages_index:
+            continue
+        with open(os.path.join(pages_folder, pages_index[url]["filename"])) as file:
+            page_texts[url] = json.load(file)["text"]
+
+    logging.info(f"Read page records from: {pages_folder}, pages: {len(page_texts)}")
+
+    return page_texts
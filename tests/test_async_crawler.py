@@ -0,0 +1,63 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.scraping.async_crawler import async_crawl_links, async_crawl_pages, CrawlBudget
+from src.scraping.html_parsing import parse_html
+
+HOME_PAGE = (
+    "<html><body><a href='/privacy'>Privacy</a><a href='/products'>Products</a>"
+    "<a href='/brochure'>Brochure</a><p>Home</p></body></html>"
+)
+
+
+def parse_page(html, url):
+    parsed_html = parse_html(html)
+    links = {f"{url.rstrip('/')}/{href.lstrip('/')}" for href in parsed_html.hrefs}
+    return links, parsed_html.text, None
+
+
+async def page(request):
+    return web.Response(
+        text="<html><body><p>Page</p></body></html>", content_type="text/html"
+    )
+
+
+async def crawl(crawl_function, *args, **kwargs):
+    async def home(request):
+        return web.Response(text=HOME_PAGE, content_type="text/html")
+
+    async def brochure(request):
+        return web.Response(body=b"%PDF-1.4", content_type="application/pdf")
+
+    app = web.Application()
+    app.router.add_get("/", home)
+    app.router.add_get("/privacy", page)
+    app.router.add_get("/products", page)
+    app.router.add_get("/brochure", brochure)
+    async with TestServer(app) as server:
+        url = str(server.make_url("/"))
+        return url, await crawl_function(url, *args, **kwargs)
+
+
+def test_crawl_pages_leaves_out_other_content_types():
+    url, page_texts = asyncio.run(crawl(async_crawl_pages, 1, parse_page))
+
+    assert sorted(page_texts) == [url, f"{url}privacy", f"{url}products"]
+
+
+def test_crawl_links_leaves_out_other_content_types():
+    url, links = asyncio.run(
+        crawl(async_crawl_links, 2, lambda html, link: parse_page(html, link)[0])
+    )
+
+    assert sorted(links) == [url, f"{url}privacy", f"{url}products"]
+
+
+def test_budget_keeps_the_most_useful_links():
+    url, page_texts = asyncio.run(
+        crawl(async_crawl_pages, 1, parse_page, budget=CrawlBudget(max_pages=2))
+    )
+
+    assert list(page_texts) == [url, f"{url}products"]
@@ -0,0 +1,36 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+import src.generative_ai_utils as generative_ai_utils
+import src.llm_cache as llm_cache
+
+
+class FakeChat:
+    model_name = "gpt-3.5-turbo"
+    temperature = 0.2
+    max_tokens = None
+
+    def __init__(self):
+        self.n_calls = 0
+
+    def invoke(self, messages):
+        self.n_calls += 1
+        return AIMessage(content=f"Summary of: {messages[-1].content}")
+
+
+def test_async_helpers_work_across_event_loops(monkeypatch, tmp_path):
+    chat = FakeChat()
+    cache = llm_cache.LLMCache(str(tmp_path))
+    monkeypatch.setattr(generative_ai_utils, "get_chat_model", lambda *args: chat)
+    monkeypatch.setattr(llm_cache, "get_llm_cache", lambda: cache)
+
+    # Every asyncio.run creates a new event loop
+    first = asyncio.run(generative_ai_utils.aget_facts_and_summary("beans", "prompt"))
+    second = asyncio.run(generative_ai_utils.aget_facts_and_summary("beans", "prompt"))
+    company = asyncio.run(generative_ai_utils.aget_company_facts_and_summary("cups"))
+
+    assert first == second == "Summary of: beans"
+    assert company == "Summary of: cups"
+    # The second call is answered by the LLM cache of the sync path
+    assert chat.n_calls == 2
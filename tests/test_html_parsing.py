@@ -0,0 +1,30 @@
+import pytest
+
+from src.scraping.html_parsing import BACKENDS, parse_html
+
+PAGES_WITH_NODES_OUTSIDE_ROOT = [
+    "<!-- generated --><html><body><p>Coffee beans</p></body></html>",
+    "<!--[if IE]><p>Old browser</p><![endif]--><html><body><p>Coffee beans</p></body></html>",
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<html xmlns="http://www.w3.org/1999/xhtml"><body><p>Coffee beans</p></body></html>',
+]
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+@pytest.mark.parametrize("html", PAGES_WITH_NODES_OUTSIDE_ROOT)
+def test_parse_page_with_nodes_outside_root(html, backend):
+    assert "Coffee beans" in parse_html(html, backend).text
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_parse_drops_boilerplate_and_keeps_links(backend):
+    html = (
+        "<html><head><script>var x = 1;</script></head><body>"
+        "<nav><a href='/about'>About</a></nav><!-- note -->"
+        "<p>Coffee beans</p>roasted<footer>Copyright</footer></body></html>"
+    )
+
+    parsed_html = parse_html(html, backend)
+
+    assert parsed_html.hrefs == ["/about"]
+    assert parsed_html.text == "Coffee beans\nroasted"
@@ -0,0 +1,31 @@
+from urllib3 import HTTPResponse
+
+from src.scraping.http_client import (
+    CappedRetry,
+    get_retry_delay,
+    get_session,
+    MAX_RETRY_AFTER_SECONDS,
+)
+
+
+def test_retry_after_is_capped():
+    retry = get_session().get_adapter("https://a.com").max_retries
+    response = HTTPResponse(headers={"Retry-After": "3600"}, status=503)
+
+    assert isinstance(retry, CappedRetry)
+    assert retry.get_retry_after(response) == MAX_RETRY_AFTER_SECONDS
+    assert retry.increment(response=response).get_retry_after(response) == (
+        MAX_RETRY_AFTER_SECONDS
+    )
+
+
+def test_short_retry_after_is_kept():
+    response = HTTPResponse(headers={"Retry-After": "2"}, status=429)
+
+    assert CappedRetry().get_retry_after(response) == 2
+    assert CappedRetry().get_retry_after(HTTPResponse(status=429)) is None
+
+
+def test_async_retry_delay_is_capped():
+    assert get_retry_delay(0, "3600") == MAX_RETRY_AFTER_SECONDS
+    assert get_retry_delay(1, "not a number") == get_retry_delay(1)
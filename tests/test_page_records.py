@@ -0,0 +1,68 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.scraping import http_client
+from src.scraping.async_crawler import async_crawl_pages
+from src.scraping.html_parsing import parse_html
+from src.utils import read_page_texts, read_pages_index, save_page_records
+
+
+def parse_page(html, url):
+    parsed_html = parse_html(html)
+    links = {f"{url.rstrip('/')}/{href.lstrip('/')}" for href in parsed_html.hrefs}
+    return links, parsed_html.text, None
+
+
+def test_failed_page_keeps_previous_record(tmp_path):
+    save_page_records(
+        str(tmp_path), {"https://a.com/": "Home", "https://a.com/about": "About us"}
+    )
+
+    changed_urls, removed_urls = save_page_records(
+        str(tmp_path), {"https://a.com/": "Home", "https://a.com/about": None}
+    )
+
+    assert changed_urls == [] and removed_urls == []
+    assert read_page_texts(str(tmp_path))["https://a.com/about"] == "About us"
+
+
+def test_failed_new_page_is_not_saved(tmp_path):
+    changed_urls, _ = save_page_records(
+        str(tmp_path), {"https://a.com/": "Home", "https://a.com/new": None}
+    )
+
+    assert changed_urls == ["https://a.com/"]
+    assert list(read_pages_index(str(tmp_path))) == ["https://a.com/"]
+
+
+def test_crawl_tells_failed_pages_from_removed_pages(monkeypatch):
+    monkeypatch.setattr(http_client, "BACKOFF_FACTOR", 0)
+
+    async def home(request):
+        return web.Response(
+            text="<html><body><a href='/down'>Down</a><a href='/gone'>Gone</a>"
+            "<p>Home</p></body></html>",
+            content_type="text/html",
+        )
+
+    async def down(request):
+        return web.Response(status=503)
+
+    async def gone(request):
+        return web.Response(status=404)
+
+    async def crawl():
+        app = web.Application()
+        app.router.add_get("/", home)
+        app.router.add_get("/down", down)
+        app.router.add_get("/gone", gone)
+        async with TestServer(app) as server:
+            url = str(server.make_url("/"))
+            return url, await async_crawl_pages(url, 1, parse_page)
+
+    url, page_texts = asyncio.run(crawl())
+
+    assert list(page_texts) == [url, f"{url}down"]
+    assert page_texts[f"{url}down"] is None
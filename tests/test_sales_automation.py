@@ -0,0 +1,55 @@
+import json
+
+from src import sales_automation
+from src.sales_automation import process_batch, read_leads
+
+
+def test_read_leads_keeps_invalid_rows(tmp_path):
+    path = tmp_path / "leads.jsonl"
+    path.write_text(
+        '{"company_url": "https://a.com", "user_id": "ann"}\n'
+        '{"company_url": "https://a.com"}\n'
+        "not json\n"
+        "\n"
+        '["https://a.com", "bob"]\n'
+    )
+
+    assert read_leads(str(path)) == [
+        {"company_url": "https://a.com", "user_id": "ann"},
+        {"company_url": "https://a.com"},
+        {},
+        {},
+    ]
+
+
+def test_read_leads_from_csv_with_empty_fields(tmp_path):
+    path = tmp_path / "leads.csv"
+    path.write_text("company_url,user_id\nhttps://a.com,ann\nhttps://b.com,\n")
+
+    leads = read_leads(str(path))
+
+    assert [lead["user_id"] for lead in leads] == ["ann", ""]
+
+
+def test_invalid_leads_get_error_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(sales_automation, "setup_logging", lambda path: None)
+    output_path = tmp_path / "results.jsonl"
+    leads = [{"company_url": "https://a.com", "user_id": " "}, {"user_id": "ann"}]
+
+    results = process_batch(leads, str(output_path))
+
+    assert results == [
+        {
+            "company_url": "https://a.com",
+            "user_id": " ",
+            "error": "Missing lead fields: user_id",
+        },
+        {
+            "company_url": None,
+            "user_id": "ann",
+            "error": "Missing lead fields: company_url",
+        },
+    ]
+    assert [json.loads(line) for line in output_path.read_text().splitlines()] == (
+        results
+    )
@@ -0,0 +1,44 @@
+import pytest
+import tiktoken
+
+from src import tokens
+
+
+class FakeEncoding:
+    def encode(self, text, disallowed_special=()):
+        return list(text)
+
+
+@pytest.fixture(autouse=True)
+def empty_encoding_cache(monkeypatch):
+    monkeypatch.setattr(tokens, "_encodings", {})
+    monkeypatch.setattr(tokens, "_failed_at", {})
+
+
+def test_failed_tokenizer_is_loaded_again_later(monkeypatch):
+    def fail(encoding_name):
+        raise OSError("offline")
+
+    monkeypatch.setattr(tiktoken, "get_encoding", fail)
+    assert tokens.get_encoding() is None
+
+    encoding = FakeEncoding()
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda encoding_name: encoding)
+    assert tokens.get_encoding() is None
+
+    monkeypatch.setattr(tokens, "TOKENIZER_RETRY_SECONDS", 0)
+    assert tokens.get_encoding() is encoding
+    assert tokens.count_tokens("abc") == 3
+
+
+@pytest.mark.parametrize("max_tokens", [2, 5, 100])
+def test_estimated_chunks_fit_max_tokens(monkeypatch, max_tokens):
+    monkeypatch.setattr(tokens, "get_encoding", lambda model: None)
+    text = "x" * 1000 + "\nshort line\n"
+
+    chunks = tokens.split_to_tokens(text, max_tokens)
+    truncated_text = tokens.truncate_to_tokens(text, max_tokens)
+
+    assert "".join(chunks) == text
+    assert all(tokens.count_tokens(chunk) <= max_tokens for chunk in chunks)
+    assert tokens.count_tokens(truncated_text) <= max_tokens
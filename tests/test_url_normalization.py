@@ -0,0 +1,26 @@
+import pytest
+
+from src.scraping.url_normalization import canonicalize_url, get_site_host
+
+
+@pytest.mark.parametrize(
+    "url, canonical_url",
+    [
+        ("http://[::1]:8080/about/", "http://[::1]:8080/about"),
+        ("https://[2001:DB8::1]:443/?utm_source=x", "https://[2001:db8::1]"),
+        (
+            "HTTPS://WWW.Example.com:443/a/?b=2&a=1#top",
+            "https://www.example.com/a?a=1&b=2",
+        ),
+        ("ftp://example.com/file", None),
+    ],
+)
+def test_canonicalize_url(url, canonical_url):
+    assert canonicalize_url(url) == canonical_url
+
+
+def test_canonical_ipv6_url_can_be_parsed_again():
+    canonical_url = canonicalize_url("http://[::1]:8080/about")
+
+    assert canonicalize_url(canonical_url) == canonical_url
+    assert get_site_host(canonical_url) == "[::1]:8080"